@@ -1,4 +1,7 @@
 import streamlit as st
+from hms import db
+from hms.campaigns import import_legacy_csv
+from hms.warmup import start_warmup, READY
 
 # Initialize session state variables
 if "logged_in" not in st.session_state:
@@ -7,6 +10,15 @@ if "username" not in st.session_state:
     st.session_state["username"] = None
 if "role" not in st.session_state:
     st.session_state["role"] = None
+
+# Open the shared database pool; applies pending schema migrations once per process
+db.get_pool()
+
+# Move the old health_campaigns.csv into the campaigns table (no-op once imported)
+import_legacy_csv()
+
+# Preload every prediction model in a background thread
+warmup = start_warmup()
     
     
 def main():
@@ -24,6 +36,10 @@ def main():
     st.markdown("- 🛏️ Bed availability tracking")
     st.markdown("- 👨‍⚕️ Doctor-patient management")
 
+    model_status = warmup.status()
+    ready = sum(state == READY for state in model_status.values())
+    st.caption(f"🧠 Prediction models ready: {ready}/{len(model_status)}")
+
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Login to Account"):
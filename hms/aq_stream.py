@@ -0,0 +1,326 @@
+"""Streaming air-quality ingestion with rolling-window averages per area.
+
+Sensor gateways drop ``*.csv`` (with a header row) and ``*.jsonl`` files
+into a feed directory and keep appending to them. Each poll reads only
+the complete lines past the offset stored in ``aq_stream_offsets``. The
+new readings and the advanced offsets are committed in one transaction,
+so a restart neither skips nor re-reads lines.
+
+Every area keeps a time window of its readings with running sums, so
+adding a reading and evicting expired ones is O(1) amortized; averages
+are never recomputed from the history. When an area's averages move by
+more than ``threshold`` (relative) since it was last scored, the changed
+areas are sent to the Pollution model in one batch and stored as
+``source = 'stream'`` campaigns.
+
+Malformed lines (bad JSON, bad CSV, invalid UTF-8) are logged and
+skipped; the offset still moves past them so one bad line cannot stall
+its file.
+
+    python -m hms.aq_stream                     # poll aq_feed/ every 30 s
+    python -m hms.aq_stream --once --dir /data/sensors
+"""
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from hms import db
+from hms.campaigns import POLLUTANTS, assess_areas, column_key, record_campaigns
+from hms.db import BASE_DIR
+
+FEED_DIR = os.environ.get("HMS_AQ_FEED_DIR", os.path.join(BASE_DIR, "aq_feed"))
+WINDOW_HOURS = 24
+CHANGE_THRESHOLD = 0.10
+# Readings below this are compared in absolute terms (avoids huge ratios near zero)
+MIN_SCALE = 1.0
+POLL_SECONDS = 30
+
+log = logging.getLogger(__name__)
+
+TIME_COLUMNS = ("read_at", "timestamp", "time", "datetime")
+READING_COLUMNS = ["area", "city", "state", "read_at", *POLLUTANTS]
+
+
+class RollingWindow:
+    """Time-windowed means of the POLLUTANTS for one area.
+
+    Missing readings (NaN) are skipped per pollutant, so each average is
+    over the readings that actually reported it. Readings are kept in
+    timestamp order so eviction from the left is always correct: a late
+    reading is inserted in place, and one already older than the window
+    is dropped.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.readings = deque()
+        self.sums = np.zeros(len(POLLUTANTS))
+        self.counts = np.zeros(len(POLLUTANTS), dtype=np.int64)
+        self.latest = float("-inf")
+
+    def add(self, at, values):
+        """Add one reading; returns False if it was already outside the window."""
+        if at <= self.latest - self.seconds:
+            return False
+        present = ~np.isnan(values)
+        if self.readings and at < self.readings[-1][0]:
+            # Late arrival: walk back from the newest (late readings are usually recent)
+            position = len(self.readings)
+            while position and self.readings[position - 1][0] > at:
+                position -= 1
+            self.readings.insert(position, (at, values, present))
+        else:
+            self.readings.append((at, values, present))
+        self.sums[present] += values[present]
+        self.counts += present
+        self.latest = max(self.latest, at)
+        self.evict(self.latest)
+        return True
+
+    def evict(self, now):
+        cutoff = now - self.seconds
+        while self.readings and self.readings[0][0] <= cutoff:
+            _, values, present = self.readings.popleft()
+            self.sums[present] -= values[present]
+            self.counts -= present
+        if not self.readings:
+            # Drop accumulated floating-point drift once the window empties
+            self.sums[:] = 0.0
+
+    def means(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts > 0, self.sums / self.counts, np.nan)
+
+    def complete(self):
+        return bool((self.counts > 0).all())
+
+
+def changed_materially(current, previous, threshold=CHANGE_THRESHOLD):
+    """True when any average moved by more than ``threshold`` of its last scored value."""
+    if previous is None:
+        return True
+    delta = np.abs(current - previous) / np.maximum(np.abs(previous), MIN_SCALE)
+    return bool((delta > threshold).any())
+
+
+# -------- Feed files --------
+def _read_complete_lines(path, offset):
+    """Complete raw (bytes) lines after ``offset``, as (lines, start offset, end offset)."""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < offset:
+            offset = 0  # truncated or replaced; start over
+        file.seek(offset)
+        data = file.read()
+    end = data.rfind(b"\n") + 1
+    return data[:end].splitlines(), offset, offset + end
+
+
+def _csv_header(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        return next(csv.reader(file), [])
+
+
+def _parse_line(path, line, header):
+    """One raw line as a record dict; raises ValueError (or csv.Error) when malformed."""
+    text = line.decode("utf-8")
+    if path.endswith(".jsonl"):
+        record = json.loads(text)
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+        return record
+    values = next(csv.reader([text]), [])
+    if len(values) != len(header):
+        raise ValueError(f"expected {len(header)} fields, got {len(values)}")
+    return dict(zip(header, values))
+
+
+def _parse_records(path, lines, offset):
+    """Records from ``lines``; malformed lines are logged and skipped."""
+    header = None
+    if not path.endswith(".jsonl"):
+        try:
+            header = _csv_header(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            log.warning("%s: unreadable CSV header, skipping %d lines: %s", path, len(lines), error)
+            return []
+        if offset == 0:
+            lines = lines[1:]
+
+    records = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            records.append(_parse_line(path, line, header))
+        except (ValueError, csv.Error) as error:  # JSONDecodeError and UnicodeDecodeError are ValueErrors
+            log.warning("%s: skipping malformed line %d after offset %d: %s", path, number, offset, error)
+    return records
+
+
+def _to_reading(record):
+    """Normalize one raw record to a READING_COLUMNS tuple (None if it has no area)."""
+    record = {column_key(key): value for key, value in record.items()}
+    area = str(record.get("area") or "").strip()
+    if not area:
+        return None
+    stamp = next((record[column] for column in TIME_COLUMNS if record.get(column)), None)
+    try:
+        read_at = datetime.fromisoformat(str(stamp)) if stamp else datetime.now()
+    except ValueError:
+        read_at = datetime.now()
+
+    def number(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    return (area, str(record.get("city") or "").strip(), str(record.get("state") or "").strip(),
+            read_at.isoformat(sep=" ", timespec="seconds"), *(number(record.get(column)) for column in POLLUTANTS))
+
+
+# -------- Stream --------
+class AirQualityStream:
+    """Tails the feed directory and keeps per-area rolling windows."""
+
+    def __init__(self, directory=FEED_DIR, window_hours=WINDOW_HOURS, threshold=CHANGE_THRESHOLD):
+        self.directory = directory
+        self.window_seconds = window_hours * 3600
+        self.threshold = threshold
+        self.windows = {}
+        self.names = {}
+        self.last_scored = {}
+        self._restore()
+
+    @staticmethod
+    def _key(area, city, state):
+        return area.lower(), city.lower(), state.lower()
+
+    def _add(self, readings):
+        """Add READING_COLUMNS tuples to their area windows."""
+        for area, city, state, read_at, *values in readings:
+            key = self._key(area, city, state)
+            window = self.windows.get(key)
+            if window is None:
+                window = self.windows[key] = RollingWindow(self.window_seconds)
+                self.names[key] = (area, city, state)
+            at = datetime.fromisoformat(read_at).timestamp()
+            window.add(at, np.array([np.nan if value is None else value for value in values], dtype=np.float64))
+
+    def _restore(self):
+        """Rebuild the windows from readings still inside the window, and the last scored averages."""
+        since = datetime.fromtimestamp(time.time() - self.window_seconds).isoformat(sep=" ", timespec="seconds")
+        rows = db.query(f"SELECT {', '.join(READING_COLUMNS)} FROM aq_readings WHERE read_at > ? ORDER BY read_at",
+                        (since,))
+        self._add(tuple(row) for row in rows)
+        # Compare against what each area was last scored with, so a restart does not rescore everyone
+        scored = db.query(f"""
+            SELECT area, city, state, {', '.join(POLLUTANTS)} FROM campaigns
+            WHERE campaign_id IN (SELECT MAX(campaign_id) FROM campaigns WHERE source = 'stream'
+                                  GROUP BY area, city, state)
+        """)
+        self.last_scored = {
+            self._key(*row[:3]): np.array([np.nan if value is None else value for value in row[3:]], dtype=np.float64)
+            for row in scored
+        }
+
+    def ingest(self):
+        """Read new lines from every feed file; return the new readings."""
+        offsets = {row["path"]: row["offset"] for row in db.query("SELECT path, offset FROM aq_stream_offsets")}
+        readings, advanced = [], []
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.csv"))
+                           + glob.glob(os.path.join(self.directory, "*.jsonl"))):
+            try:
+                lines, start, end = _read_complete_lines(path, offsets.get(path, 0))
+            except OSError as error:  # e.g. rotated away between glob and open
+                log.warning("%s: cannot read: %s", path, error)
+                continue
+            if end == offsets.get(path, 0):
+                continue
+            parsed = (_to_reading(record) for record in _parse_records(path, lines, start))
+            readings.extend(reading for reading in parsed if reading)
+            advanced.append((path, end))
+
+        if advanced:
+            now = datetime.now().isoformat(sep=" ", timespec="seconds")
+            cutoff = datetime.fromtimestamp(time.time() - self.window_seconds).isoformat(sep=" ", timespec="seconds")
+            with db.transaction(immediate=True) as conn:
+                conn.executemany(
+                    f"INSERT INTO aq_readings ({', '.join(READING_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(READING_COLUMNS))})",
+                    readings,
+                )
+                conn.executemany("""
+                    INSERT INTO aq_stream_offsets (path, offset, updated_at) VALUES (?, ?, ?)
+                    ON CONFLICT (path) DO UPDATE SET offset = excluded.offset, updated_at = excluded.updated_at
+                """, [(path, offset, now) for path, offset in advanced])
+                # Only the window is needed to restore state after a restart
+                conn.execute("DELETE FROM aq_readings WHERE read_at <= ?", (cutoff,))
+        return readings
+
+    def changed_areas(self):
+        """Areas with a complete window that moved materially since they were last scored."""
+        return [key for key in self.windows
+                if self.windows[key].complete()
+                and changed_materially(self.windows[key].means(), self.last_scored.get(key), self.threshold)]
+
+    def score(self, keys):
+        """Predict AQI for ``keys`` in one batch and store them as campaigns."""
+        if not keys:
+            return pd.DataFrame()
+        means = np.vstack([self.windows[key].means() for key in keys])
+        areas = pd.DataFrame([self.names[key] for key in keys], columns=["area", "city", "state"])
+        areas = assess_areas(areas.join(pd.DataFrame(means, columns=POLLUTANTS)))
+        record_campaigns(areas.assign(source="stream"))
+        for key, row in zip(keys, means):
+            self.last_scored[key] = row
+        return areas
+
+    def poll(self):
+        """One ingest-and-score cycle; returns (readings ingested, scored areas frame)."""
+        readings = self.ingest()
+        self._add(readings)
+        # Expiring old readings moves the averages too, even without new data
+        now = time.time()
+        for window in self.windows.values():
+            window.evict(max(window.latest, now))
+        return len(readings), self.score(self.changed_areas())
+
+    def run(self, interval=POLL_SECONDS):
+        while True:
+            try:
+                count, scored = self.poll()
+                if count:
+                    print(f"{datetime.now():%H:%M:%S} ingested {count} readings, rescored {len(scored)} areas")
+            except Exception:
+                # A failed poll commits nothing, so the next one retries the same lines
+                log.exception("Air-quality poll failed; retrying in %s s", interval)
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tail air-quality sensor files and rescore changed areas.")
+    parser.add_argument("--dir", default=FEED_DIR, help="feed directory of *.csv / *.jsonl files")
+    parser.add_argument("--window-hours", type=float, default=WINDOW_HOURS, help="rolling window length")
+    parser.add_argument("--threshold", type=float, default=CHANGE_THRESHOLD, help="relative change that triggers rescoring")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="seconds between polls")
+    parser.add_argument("--once", action="store_true", help="poll once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    os.makedirs(args.dir, exist_ok=True)
+    stream = AirQualityStream(args.dir, args.window_hours, args.threshold)
+    if args.once:
+        count, scored = stream.poll()
+        print(f"Ingested {count} readings, rescored {len(scored)} areas")
+    else:
+        stream.run(args.interval)
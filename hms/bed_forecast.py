@@ -0,0 +1,165 @@
+"""Bed occupancy forecast from current assignments and predicted length of stay.
+
+Each occupant's projected discharge is ``patient_beds.assigned_at`` plus
+their latest stored LOS prediction for that ward (scored on the fly when
+the nightly batch has not reached them yet). Discharges are kept in a
+heap and popped day by day to project the free beds per ward at the end
+of each of the next N days, less any expected admissions.
+
+With ``simulations`` > 0 the forecast also carries low/high bands: each
+run draws every occupant's stay from one of the model's individual trees,
+so the band reflects how much the trees disagree. Only averaging ensembles
+(the ICU Random Forest) have a per-tree spread; boosted models (the Ward
+XGBoost) contribute their point prediction to every run.
+
+    python -m hms.bed_forecast --days 7 --simulations 500
+"""
+import argparse
+import heapq
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from hms import db
+from hms.beds import fetch_bed_status
+from hms.features import LOS_SPEC
+from hms.los_batch import WARD_MODELS
+from hms.model_registry import get_registry
+from hms.prediction_cache import cached_predict
+from hms.tree_compiler import MEAN, CompiledEnsemble
+
+DEFAULT_DAYS = 7
+SIMULATIONS = 500
+BAND_PERCENTILES = (10, 90)
+
+
+def load_occupants():
+    """Current occupants with their ward, assigned_at and latest LOS prediction (NaN if never scored)."""
+    return db.read_frame("""
+        SELECT b.patient_id, b.ward_type, b.assigned_at,
+               (SELECT l.predicted_los FROM los_predictions l
+                WHERE l.patient_id = b.patient_id AND l.ward_type = b.ward_type
+                ORDER BY l.scored_at DESC LIMIT 1) AS predicted_los,
+               p.*
+        FROM patient_beds b LEFT JOIN patients p ON p.patient_id = b.patient_id
+    """)
+
+
+def tree_predictions(model_name, X):
+    """Per-tree LOS predictions, shape (rows, trees); None for boosted models."""
+    predictor = get_registry().predictor(model_name)
+    if isinstance(predictor, CompiledEnsemble):
+        return predictor.tree_outputs(X)[:, :, 0] if predictor.aggregate == MEAN else None
+    # scikit-learn forests keep a list of trees; boosting keeps an array of stages
+    trees = getattr(predictor, "estimators_", None)
+    if not isinstance(trees, list):
+        return None
+    X = np.asarray(X, dtype=np.float32)
+    return np.column_stack([tree.predict(X) for tree in trees])
+
+
+def _prepare(occupants, now):
+    """Fill missing predictions and add the ``discharge_at`` column."""
+    # p.* repeats patient_id (NULL when the patient row is missing); keep the bed's
+    occupants = occupants.loc[:, ~occupants.columns.duplicated()].copy()
+    occupants["predicted_los"] = pd.to_numeric(occupants["predicted_los"], errors="coerce")
+    for ward_type, model_name in WARD_MODELS.items():
+        missing = (occupants["ward_type"] == ward_type) & occupants["predicted_los"].isna()
+        if missing.any():
+            occupants.loc[missing, "predicted_los"] = cached_predict(model_name, LOS_SPEC.build(occupants[missing]))
+
+    assigned = pd.to_datetime(occupants["assigned_at"], errors="coerce").fillna(pd.Timestamp(now))
+    occupants["assigned_at"] = assigned
+    # Patients already past their predicted stay are expected to leave now
+    occupants["discharge_at"] = (assigned + pd.to_timedelta(occupants["predicted_los"], unit="D")).clip(lower=now)
+    return occupants
+
+
+def _day_ends(now, days):
+    """Midnight at the end of today and each following day."""
+    return [datetime.combine(now.date() + timedelta(days=day + 1), time.min) for day in range(days)]
+
+
+def _simulate(occupants, now, day_ends, simulations, seed=0):
+    """Cumulative discharges per ward, shape (simulations, days), from per-tree stays."""
+    rng = np.random.default_rng(seed)
+    horizon = np.array([(end - now).total_seconds() / 86400 for end in day_ends])
+    cumulative = {}
+    for ward_type, model_name in WARD_MODELS.items():
+        ward = occupants[occupants["ward_type"] == ward_type]
+        elapsed = (now - ward["assigned_at"]).dt.total_seconds().to_numpy() / 86400
+        spread = tree_predictions(model_name, LOS_SPEC.build(ward)) if len(ward) else None
+        if spread is None:
+            stays = np.broadcast_to(ward["predicted_los"].to_numpy(dtype=np.float64), (simulations, len(ward)))
+        else:
+            picks = rng.integers(0, spread.shape[1], size=(simulations, len(ward)))
+            stays = spread[np.arange(len(ward)), picks]
+        # Days from now until each simulated discharge, shape (simulations, occupants)
+        remaining = np.maximum(stays - elapsed, 0.0)
+        cumulative[ward_type] = (remaining[:, :, None] < horizon[None, None, :]).sum(axis=1)
+    return cumulative
+
+
+def forecast(days=DEFAULT_DAYS, admissions_per_day=None, simulations=0, now=None):
+    """Projected free beds per ward at the end of each of the next ``days`` days.
+
+    Returns a DataFrame with day, ward_type, discharges (that day),
+    admissions (expected that day) and projected_free; plus low/high when
+    ``simulations`` > 0. projected_free goes negative when expected
+    admissions outrun the freed beds.
+    """
+    now = now or datetime.now()
+    admissions_per_day = admissions_per_day or {}
+    status = fetch_bed_status()
+    occupants = _prepare(load_occupants(), now)
+    day_ends = _day_ends(now, days)
+
+    heap = list(zip(occupants["discharge_at"], occupants["ward_type"], occupants["patient_id"]))
+    heapq.heapify(heap)
+
+    freed = {ward_type: 0 for ward_type in status}
+    rows = []
+    for day, end in enumerate(day_ends):
+        discharged = dict.fromkeys(status, 0)
+        while heap and heap[0][0] < end:
+            _, ward_type, _ = heapq.heappop(heap)
+            if ward_type in discharged:
+                discharged[ward_type] += 1
+        for ward_type, counts in status.items():
+            freed[ward_type] += discharged[ward_type]
+            admitted = admissions_per_day.get(ward_type, 0)
+            rows.append({
+                "day": end.date() - timedelta(days=1),
+                "ward_type": ward_type,
+                "discharges": discharged[ward_type],
+                "admissions": admitted,
+                "projected_free": counts["Available Beds"] + freed[ward_type] - admitted * (day + 1),
+            })
+    result = pd.DataFrame(rows)
+
+    if simulations and not result.empty:
+        cumulative = _simulate(occupants, now, day_ends, simulations)
+        low, high = BAND_PERCENTILES
+        for ward_type, counts in status.items():
+            if ward_type not in cumulative:
+                continue
+            mask = result["ward_type"] == ward_type
+            base = counts["Available Beds"] - np.array(
+                [admissions_per_day.get(ward_type, 0) * (day + 1) for day in range(days)]
+            )
+            result.loc[mask, "low"] = base + np.percentile(cumulative[ward_type], low, axis=0)
+            result.loc[mask, "high"] = base + np.percentile(cumulative[ward_type], high, axis=0)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forecast free beds per ward.")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--simulations", type=int, default=0, help="Monte Carlo runs for low/high bands")
+    parser.add_argument("--icu-admissions", type=float, default=0, help="expected ICU admissions per day")
+    parser.add_argument("--ward-admissions", type=float, default=0, help="expected Ward admissions per day")
+    args = parser.parse_args()
+
+    result = forecast(args.days, {"ICU": args.icu_admissions, "Ward": args.ward_admissions}, args.simulations)
+    print(result.to_string(index=False))
@@ -0,0 +1,199 @@
+"""Bed inventory: ward status and contention-safe assignment.
+
+Every bed is a row in ``beds``. The ward counters in ``hospital_beds``
+and the ``bed_state_version`` change counter are maintained by triggers
+on that table and are never changed by hand.
+"""
+from datetime import datetime
+
+from hms import db
+from hms.patient_context import invalidate_patient
+
+
+def fetch_bed_status():
+    """Return {ward_type: {"Total Beds", "Occupied Beds", "Available Beds"}}."""
+    rows = db.query("SELECT ward_type, total_beds, occupied_beds, available_beds FROM hospital_beds")
+    return {row[0]: {"Total Beds": row[1], "Occupied Beds": row[2], "Available Beds": row[3]} for row in rows}
+
+
+def list_occupants():
+    """Current assignments as (patient_id, ward_type, bed_assigned) rows, by ward and bed."""
+    return db.query("SELECT patient_id, ward_type, bed_assigned FROM patient_beds ORDER BY ward_type, bed_assigned")
+
+
+def bed_state_version():
+    """Counter bumped by triggers on every change to ``beds``; cheap to poll."""
+    return db.query_one("SELECT version FROM bed_state_version WHERE id = 1")[0]
+
+
+def assign_bed(patient_id, ward_type):
+    """Claim the lowest free bed in ``ward_type`` for a registered patient.
+
+    The claim is one conditional UPDATE under BEGIN IMMEDIATE, so concurrent
+    admissions queue on the write lock instead of overbooking.
+    """
+    with db.transaction(immediate=True) as conn:
+        claimed = conn.execute("""
+            UPDATE beds SET status = 'occupied', patient_id = :patient_id
+            WHERE bed_id = (
+                SELECT bed_id FROM beds
+                WHERE ward_type = :ward_type AND status = 'free'
+                ORDER BY bed_id LIMIT 1
+            )
+            AND NOT EXISTS (SELECT 1 FROM patient_beds WHERE patient_id = :patient_id)
+            AND EXISTS (SELECT 1 FROM patients WHERE patient_id = :patient_id)
+            RETURNING bed_id
+        """, {"patient_id": patient_id, "ward_type": ward_type}).fetchall()
+
+        if not claimed:
+            if not conn.execute("SELECT 1 FROM patients WHERE patient_id = ?", (patient_id,)).fetchone():
+                return False, f"❌ Patient {patient_id} not found."
+            if conn.execute("SELECT 1 FROM patient_beds WHERE patient_id = ?", (patient_id,)).fetchone():
+                return False, "❌ Patient already has a bed assigned!"
+            return False, f"❌ No available beds in {ward_type}."
+
+        bed_id = claimed[0][0]
+        conn.execute(
+            "INSERT INTO patient_beds (patient_id, ward_type, bed_assigned, assigned_at) VALUES (?, ?, ?, ?)",
+            (patient_id, ward_type, bed_id, datetime.now()),
+        )
+
+    invalidate_patient(patient_id)
+    return True, f"✅ Bed {bed_id} assigned to patient {patient_id} in {ward_type}."
+
+
+def revoke_bed(patient_id):
+    """Release the patient's bed back to the free pool."""
+    with db.transaction(immediate=True) as conn:
+        released = conn.execute(
+            "DELETE FROM patient_beds WHERE patient_id = ? RETURNING bed_assigned", (patient_id,)
+        ).fetchall()
+
+        if not released:
+            return False, "❌ No bed found for this patient."
+
+        conn.execute(
+            "UPDATE beds SET status = 'free', patient_id = NULL WHERE bed_id = ?", (released[0][0],)
+        )
+
+    invalidate_patient(patient_id)
+    return True, f"✅ Bed revoked for patient {patient_id}."
+
+
+# -------- Bulk moves --------
+ASSIGN = "assign"
+TRANSFER = "transfer"
+DISCHARGE = "discharge"
+
+
+def parse_bed_moves(text):
+    """Parse one move per line: "assign P1 ICU", "transfer P2 Ward" or "discharge P3".
+
+    Returns (moves, errors) where moves are (action, patient_id, ward_type) tuples.
+    """
+    moves, errors = [], []
+    for number, line in enumerate(text.splitlines(), start=1):
+        parts = line.replace(",", " ").split()
+        if not parts:
+            continue
+        action = parts[0].lower()
+        if action == DISCHARGE and len(parts) == 2:
+            moves.append((DISCHARGE, parts[1], None))
+        elif action in (ASSIGN, TRANSFER) and len(parts) == 3:
+            moves.append((action, parts[1], parts[2]))
+        else:
+            errors.append(f"Line {number}: expected 'assign|transfer <patient> <ward>' or 'discharge <patient>'")
+    return moves, errors
+
+
+def apply_bed_moves(moves):
+    """Validate and apply a batch of (action, patient_id, ward_type) moves atomically.
+
+    Everything is checked against the registered patients, the current
+    assignments and the free-bed pool under BEGIN IMMEDIATE; beds released
+    by discharges and transfers in the same batch can be reused. If any
+    move is invalid nothing is applied. Returns (ok, messages).
+    """
+    now = datetime.now()
+    with db.transaction(immediate=True) as conn:
+        wards = {row[0] for row in conn.execute("SELECT ward_type FROM hospital_beds")}
+        free = dict(conn.execute(
+            "SELECT ward_type, COUNT(*) FROM beds WHERE status = 'free' GROUP BY ward_type"
+        ).fetchall())
+        patients = [patient_id for _, patient_id, _ in moves]
+        placeholders = ", ".join("?" * len(patients))
+        current = {
+            row[0]: (row[1], row[2]) for row in conn.execute(
+                f"SELECT patient_id, ward_type, bed_assigned FROM patient_beds WHERE patient_id IN ({placeholders})",
+                patients,
+            )
+        } if patients else {}
+        registered = {
+            row[0] for row in conn.execute(f"SELECT patient_id FROM patients WHERE patient_id IN ({placeholders})", patients)
+        } if patients else set()
+
+        errors, seen = [], set()
+        released, needed = {}, {}
+        for action, patient_id, ward_type in moves:
+            if patient_id in seen:
+                errors.append(f"❌ {patient_id}: listed more than once.")
+                continue
+            seen.add(patient_id)
+            # A bed held by a deleted patient can still be discharged, never moved
+            if patient_id not in registered and not (action == DISCHARGE and patient_id in current):
+                errors.append(f"❌ {patient_id}: no such patient.")
+            elif action == ASSIGN and patient_id in current:
+                errors.append(f"❌ {patient_id}: already has a bed in {current[patient_id][0]}.")
+            elif action in (TRANSFER, DISCHARGE) and patient_id not in current:
+                errors.append(f"❌ {patient_id}: has no bed to {action}.")
+            elif action in (ASSIGN, TRANSFER) and ward_type not in wards:
+                errors.append(f"❌ {patient_id}: unknown ward '{ward_type}'.")
+            elif action == TRANSFER and current[patient_id][0] == ward_type:
+                errors.append(f"❌ {patient_id}: already in {ward_type}.")
+            elif action not in (ASSIGN, TRANSFER, DISCHARGE):
+                errors.append(f"❌ {patient_id}: unknown action '{action}'.")
+            else:
+                if action in (TRANSFER, DISCHARGE):
+                    released[current[patient_id][0]] = released.get(current[patient_id][0], 0) + 1
+                if action in (ASSIGN, TRANSFER):
+                    needed[ward_type] = needed.get(ward_type, 0) + 1
+        for ward_type, count in needed.items():
+            available = free.get(ward_type, 0) + released.get(ward_type, 0)
+            if count > available:
+                errors.append(f"❌ {ward_type}: {count} beds needed but only {available} would be free.")
+        if errors:
+            return False, errors
+
+        # Release first so transfers and assignments can reuse the freed beds
+        leaving = [(current[patient_id][1],) for action, patient_id, _ in moves if action in (TRANSFER, DISCHARGE)]
+        conn.executemany("UPDATE beds SET status = 'free', patient_id = NULL WHERE bed_id = ?", leaving)
+        conn.executemany(
+            "DELETE FROM patient_beds WHERE patient_id = ?",
+            [(patient_id,) for action, patient_id, _ in moves if action == DISCHARGE],
+        )
+
+        placements = []
+        for ward_type, count in needed.items():
+            beds = [row[0] for row in conn.execute(
+                "SELECT bed_id FROM beds WHERE ward_type = ? AND status = 'free' ORDER BY bed_id LIMIT ?",
+                (ward_type, count),
+            )]
+            arriving = [patient_id for action, patient_id, ward in moves if action in (ASSIGN, TRANSFER) and ward == ward_type]
+            placements.extend(zip(arriving, [ward_type] * count, beds))
+        conn.executemany(
+            "UPDATE beds SET status = 'occupied', patient_id = ? WHERE bed_id = ?",
+            [(patient_id, bed_id) for patient_id, _, bed_id in placements],
+        )
+        # A transfer starts a new stay in the new ward
+        conn.executemany("""
+            INSERT INTO patient_beds (patient_id, ward_type, bed_assigned, assigned_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (patient_id) DO UPDATE SET
+                ward_type = excluded.ward_type,
+                bed_assigned = excluded.bed_assigned,
+                assigned_at = excluded.assigned_at
+        """, [(patient_id, ward_type, bed_id, now) for patient_id, ward_type, bed_id in placements])
+
+    invalidate_patient(*patients)
+    messages = [f"✅ {patient_id}: bed {bed_id} in {ward_type}." for patient_id, ward_type, bed_id in placements]
+    messages += [f"✅ {patient_id}: discharged." for action, patient_id, _ in moves if action == DISCHARGE]
+    return True, messages
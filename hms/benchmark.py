@@ -0,0 +1,298 @@
+"""Inference benchmarks for the registered prediction models.
+
+For every model this measures unpickle time, single-row p50/p99 latency,
+throughput at several batch sizes and peak traced memory, on synthetic
+inputs shaped like each page's feature layout. When a compiled ensemble
+built from the current pickle exists (see hms.tree_compiler) it is
+benchmarked alongside the original; a stale one is reported as skipped.
+
+Each variant is loaded once untimed before its load is timed, so the
+one-off import of scikit-learn / XGBoost is not charged to whichever
+model happens to run first.
+
+    python -m hms.benchmark                       # all models, writes JSON
+    python -m hms.benchmark los_icu --compare bench_results/previous.json
+
+``--compare`` exits with status 1 when any metric regressed by more than
+``--threshold`` percent, so it can gate a model retrain.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from hms.db import BASE_DIR
+from hms.model_registry import get_registry
+from hms.tree_compiler import CompiledEnsemble, compiled_path
+
+RESULTS_DIR = os.path.join(BASE_DIR, "bench_results")
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+SINGLE_ROW_RUNS = 200
+
+# Higher is better for these metrics; lower is better for everything else
+HIGHER_IS_BETTER = ("rows_per_second",)
+
+
+# -------- Synthetic inputs --------
+def _uniform(rng, n, low, high):
+    return rng.uniform(low, high, n)
+
+
+def _flags(rng, n, p=0.3):
+    return (rng.random(n) < p).astype(np.float64)
+
+
+def los_rows(rng, n):
+    """22-column LOS array in the order used by pages/los_prediction.py."""
+    return np.column_stack([
+        _uniform(rng, n, 5, 20),        # HB
+        _uniform(rng, n, 2, 30),        # TLC
+        _uniform(rng, n, 50, 450),      # platelets
+        _uniform(rng, n, 60, 400),      # glucose
+        _uniform(rng, n, 10, 150),      # urea
+        _uniform(rng, n, 0.4, 6),       # creatinine
+        _uniform(rng, n, 15, 70),       # EF
+        _uniform(rng, n, 50, 4000),     # BNP
+        rng.integers(18, 95, n),        # age
+        *[_flags(rng, n) for _ in range(13)],  # rural, admission type, CAD ... pulmonary embolism
+    ])
+
+
+def risk_rows(rng, n):
+    """13-column CVRA array in the order used by pages/risk_analysis.py."""
+    return np.column_stack([
+        rng.integers(18, 95, n),        # age
+        *[_flags(rng, n, 0.5) for _ in range(5)],  # gender, smoking, diabetes, hypertension, CAD
+        _uniform(rng, n, 5, 20),        # HB
+        _uniform(rng, n, 2000, 20000),  # TLC
+        _uniform(rng, n, 50, 500),      # glucose
+        _uniform(rng, n, 5, 200),       # urea
+        _uniform(rng, n, 0.1, 10),      # creatinine
+        _uniform(rng, n, 10, 5000),     # BNP
+        _uniform(rng, n, 10, 80),       # EF
+    ])
+
+
+def survival_rows(rng, n):
+    """13-column survival frame as built in pages/survival_analysis.py."""
+    columns = ["gender", "type_of_admission", "smoking", "alcohol", "htn", "dm", "cad",
+               "prior_cmp", "ckd", "heart_failure", "hfref", "hfnef"]
+    frame = pd.DataFrame({"age": rng.integers(18, 95, n)})
+    for column in columns:
+        frame[column] = rng.integers(0, 2, n)
+    return frame
+
+
+def pollution_rows(rng, n):
+    """10-column pollution array as built in pages/pollution_campaign.py."""
+    return np.column_stack([
+        _uniform(rng, n, 0, 500),       # PM2.5
+        _uniform(rng, n, 0, 600),       # PM10
+        _uniform(rng, n, 0, 200),       # NO2
+        _uniform(rng, n, 0, 200),       # NH3
+        _uniform(rng, n, 0, 100),       # SO2
+        _uniform(rng, n, 0, 10),        # CO
+        _uniform(rng, n, 0, 300),       # ozone
+        _uniform(rng, n, 20, 50),       # max temp
+        _uniform(rng, n, -10, 30),      # min temp
+        _uniform(rng, n, 0, 100),       # humidity
+    ])
+
+
+def bill_rows(rng, n, feature_names):
+    """Billing frame reindexed to the pickled feature_names, as in pages/billing.py."""
+    frame = pd.DataFrame({
+        "Age": rng.integers(18, 95, n),
+        "Gender_Female": rng.integers(0, 2, n),
+        "Admission_Type_ICU": rng.integers(0, 2, n),
+        "Length_of_Stay": rng.integers(1, 31, n),
+    })
+    diseases = [name for name in feature_names if name not in frame.columns]
+    for disease in diseases:
+        frame[disease] = _flags(rng, n, 0.1).astype(int)
+    return frame.reindex(columns=feature_names, fill_value=0)
+
+
+def synthetic_inputs(name, n, seed=0):
+    rng = np.random.default_rng(seed)
+    if name in ("los_icu", "los_ward"):
+        return los_rows(rng, n)
+    if name == "cvra":
+        return risk_rows(rng, n)
+    if name == "survival":
+        return survival_rows(rng, n)
+    if name == "pollution":
+        return pollution_rows(rng, n)
+    if name == "hospital_bill":
+        return bill_rows(rng, n, get_registry().get(name).feature_names)
+    raise KeyError(f"No synthetic input generator for '{name}'")
+
+
+# -------- Measurements --------
+def _timed_load(loader):
+    loader()  # untimed: pulls in the libraries the pickle needs
+    tracemalloc.start()
+    started = time.perf_counter()
+    predictor = loader()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return predictor, seconds, peak
+
+
+def _single_row_latency(predictor, rows, runs):
+    timings = np.empty(runs)
+    for i in range(runs):
+        row = rows.iloc[[i % len(rows)]] if hasattr(rows, "iloc") else rows[i % len(rows)].reshape(1, -1)
+        started = time.perf_counter()
+        predictor.predict(row)
+        timings[i] = time.perf_counter() - started
+    return {
+        "p50_ms": float(np.percentile(timings, 50) * 1e3),
+        "p99_ms": float(np.percentile(timings, 99) * 1e3),
+    }
+
+
+def _throughput(predictor, rows, batch_sizes):
+    results = {}
+    for size in batch_sizes:
+        batch = rows.iloc[:size] if hasattr(rows, "iloc") else rows[:size]
+        repeats = max(1, 2000 // size)
+        predictor.predict(batch)  # warm caches before timing
+        started = time.perf_counter()
+        for _ in range(repeats):
+            predictor.predict(batch)
+        seconds = (time.perf_counter() - started) / repeats
+        results[str(size)] = {"batch_ms": seconds * 1e3, "rows_per_second": size / seconds}
+    return results
+
+
+def _predict_peak_memory(predictor, rows):
+    tracemalloc.start()
+    predictor.predict(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def benchmark_model(name, batch_sizes=BATCH_SIZES, runs=SINGLE_ROW_RUNS):
+    """Benchmark one registered model; returns {variant: metrics}."""
+    registry = get_registry()
+
+    def unpickle():
+        with open(registry.path(name), "rb") as file:
+            return pickle.load(file)
+
+    loaders = {"model": unpickle}
+    skipped = {}
+    if os.path.exists(compiled_path(name)):
+        with open(registry.path(name), "rb") as file:
+            source_sha256 = hashlib.sha256(file.read()).hexdigest()
+        if CompiledEnsemble.load(compiled_path(name)).source_sha256 == source_sha256:
+            loaders["compiled"] = lambda: CompiledEnsemble.load(compiled_path(name))
+        else:
+            skipped["compiled"] = {"skipped": "stale: built from an older model file; recompile with hms.tree_compiler"}
+
+    rows = synthetic_inputs(name, max(batch_sizes + (runs,)))
+    results = {}
+    for variant, loader in loaders.items():
+        predictor, load_seconds, load_peak = _timed_load(loader)
+        results[variant] = {
+            "load_seconds": load_seconds,
+            "load_peak_mb": load_peak / 2**20,
+            "single_row": _single_row_latency(predictor, rows, runs),
+            "batch": _throughput(predictor, rows, batch_sizes),
+            "predict_peak_mb": _predict_peak_memory(predictor, rows) / 2**20,
+        }
+    results.update(skipped)
+    return results
+
+
+def run(names=None, batch_sizes=BATCH_SIZES, runs=SINGLE_ROW_RUNS):
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "models": {},
+    }
+    for name in names or get_registry().names():
+        try:
+            report["models"][name] = benchmark_model(name, batch_sizes, runs)
+        except FileNotFoundError as exc:
+            report["models"][name] = {"skipped": str(exc)}
+    return report
+
+
+# -------- Run-over-run comparison --------
+def _flatten(metrics, prefix=""):
+    flat = {}
+    for key, value in metrics.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare(previous, current, threshold=20.0):
+    """Return [(metric, old, new, percent_change, regressed)] for shared metrics."""
+    old, new = _flatten(previous["models"]), _flatten(current["models"])
+    rows = []
+    for metric in sorted(old.keys() & new.keys()):
+        if not old[metric]:
+            continue
+        change = (new[metric] - old[metric]) / old[metric] * 100
+        worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+        rows.append((metric, old[metric], new[metric], change, worse > threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model inference.")
+    parser.add_argument("names", nargs="*", help="model names (default: all registered)")
+    parser.add_argument("--runs", type=int, default=SINGLE_ROW_RUNS, help="single-row predictions to time")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--output", help="result JSON path (default: bench_results/bench-<time>.json)")
+    parser.add_argument("--compare", help="previous result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    report = run(args.names, tuple(args.batch_sizes), args.runs)
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {output}")
+
+    for name, variants in report["models"].items():
+        for variant, metrics in variants.items():
+            if variant == "skipped":
+                print(f"{name}: skipped ({metrics})")
+                continue
+            if "skipped" in metrics:
+                print(f"{name} [{variant}]: skipped ({metrics['skipped']})")
+                continue
+            largest = metrics["batch"][str(max(args.batch_sizes))]
+            print(f"{name} [{variant}]: load {metrics['load_seconds'] * 1e3:.1f} ms, "
+                  f"p50 {metrics['single_row']['p50_ms']:.3f} ms, p99 {metrics['single_row']['p99_ms']:.3f} ms, "
+                  f"{largest['rows_per_second']:,.0f} rows/s at batch {max(args.batch_sizes)}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+        regressions = [row for row in compare(previous, report, args.threshold) if row[4]]
+        for metric, old, new, change, _ in regressions:
+            print(f"REGRESSION {metric}: {old:.4g} -> {new:.4g} ({change:+.1f}%)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions beyond threshold.")
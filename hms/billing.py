@@ -0,0 +1,162 @@
+"""Billing ledger: itemized charges plus per-patient bill totals.
+
+Each estimate is written as one bill: a set of timestamped ``bill_items``
+rows sharing a ``bill_id``. The patient's ``billing`` row is upserted from
+those items in the same transaction and always reflects the latest bill.
+"""
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from hms import db
+from hms.features import BILL_SPEC
+from hms.patient_context import invalidate_patient
+from hms.prediction_cache import cached_predict
+
+PHARMACY = "pharmacy"
+HOSPITAL = "hospital"
+DISEASE = "disease"
+
+# Fixed charges added on top of the model's base charge
+DISEASE_CHARGES = {
+    "STEMI": 10000, "ACS": 8000, "Heart Failure": 12000, "CVA Infarct": 7000,
+    "DVT": 5000, "Shock": 15000, "Pulmonary Embolism": 9000, "AKI": 11000,
+    "VT": 6000, "CHB": 7500, "Severe Chest Infection": 6500,
+    "Cardiogenic Shock": 13000, "CVA Bleed": 9500, "Infective Endocarditis": 10000
+}
+STAY_CHARGE_PER_DAY = 500
+ADMISSION_CHARGES = {"General Ward": 2000, "ICU": 5000}
+MAX_STAY_DAYS = 30
+
+
+def record_bill(patient_id, pharmacy_items, hospital_items, disease_items):
+    """Write a bill and return (pharmacy_total, hospital_total, grand_total).
+
+    Each ``*_items`` argument maps a line item name to its amount.
+    """
+    bill_id = uuid.uuid4().hex[:8]
+    # Local time, like every other timestamp in the database (CURRENT_TIMESTAMP is UTC)
+    now = datetime.now().isoformat(sep=" ", timespec="seconds")
+    rows = [
+        (bill_id, patient_id, category, item, float(amount), now)
+        for category, items in ((PHARMACY, pharmacy_items), (HOSPITAL, hospital_items), (DISEASE, disease_items))
+        for item, amount in items.items()
+    ]
+
+    with db.transaction(immediate=True) as conn:
+        conn.executemany(
+            "INSERT INTO bill_items (bill_id, patient_id, category, item, amount, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        totals = conn.execute("""
+            INSERT INTO billing (patient_id, pharmacy_total, hospital_total, grand_total, bill_id, updated_at)
+            SELECT :patient_id,
+                   TOTAL(amount) FILTER (WHERE category = 'pharmacy'),
+                   TOTAL(amount) FILTER (WHERE category <> 'pharmacy'),
+                   TOTAL(amount),
+                   :bill_id,
+                   :now
+            FROM bill_items WHERE bill_id = :bill_id
+            ON CONFLICT (patient_id) DO UPDATE SET
+                pharmacy_total = excluded.pharmacy_total,
+                hospital_total = excluded.hospital_total,
+                grand_total = excluded.grand_total,
+                bill_id = excluded.bill_id,
+                updated_at = excluded.updated_at
+            RETURNING pharmacy_total, hospital_total, grand_total
+        """, {"patient_id": patient_id, "bill_id": bill_id, "now": now}).fetchall()
+
+    invalidate_patient(patient_id)
+    return tuple(totals[0])
+
+
+def revenue_by_category(start=None, end=None, current_only=True):
+    """Billed amounts per category and item between two timestamps (inclusive).
+
+    ``start`` and ``end`` are datetimes or "YYYY-MM-DD HH:MM:SS" strings in
+    local time; either may be None for an open range. With ``current_only``
+    only each patient's latest bill is counted, so re-estimated bills are
+    not double counted.
+    """
+    # Bounds are added only when given: created_at has NUMERIC affinity, so a
+    # text timestamp compared with a sentinel like '9999' compares as TEXT <= INTEGER
+    bounds = []
+    if start is not None:
+        bounds.append("AND i.created_at >= :start")
+    if end is not None:
+        bounds.append("AND i.created_at <= :end")
+    return db.read_frame(f"""
+        SELECT i.category, i.item, COUNT(*) AS line_items, TOTAL(i.amount) AS revenue
+        FROM bill_items i
+        WHERE (NOT :current_only OR EXISTS (SELECT 1 FROM billing b WHERE b.bill_id = i.bill_id))
+          {' '.join(bounds)}
+        GROUP BY i.category, i.item
+        ORDER BY revenue DESC
+    """, {"start": _timestamp(start), "end": _timestamp(end), "current_only": current_only})
+
+
+def _timestamp(value):
+    """Format a datetime the way bill timestamps are stored; strings pass through."""
+    return value.isoformat(sep=" ", timespec="seconds") if isinstance(value, datetime) else value
+
+
+def what_if_costs(age, gender, selected_diseases, feature_names, los,
+                  wards=("General Ward", "ICU"), max_los=MAX_STAY_DAYS):
+    """Hospital cost curve and disease sensitivity from one batched prediction.
+
+    The batch holds every (ward, length of stay 1..max_los) combination with
+    the selected diseases, plus every ward with each disease toggled at
+    ``los``. Returns (curve, sensitivity) DataFrames; the sensitivity table
+    holds the change in hospital total per toggled disease and ward.
+    """
+    diseases = list(DISEASE_CHARGES)
+    wards = np.asarray(wards)
+    stays = np.arange(1, max_los + 1)
+    current = np.array([disease in selected_diseases for disease in diseases], dtype=np.int64)
+
+    # Curve rows: every ward x every length of stay
+    curve_wards = np.repeat(wards, len(stays))
+    curve_stays = np.tile(stays, len(wards))
+    curve_flags = np.tile(current, (len(curve_stays), 1))
+
+    # Sensitivity rows: every ward x every single-disease toggle at the chosen stay
+    toggle_wards = np.repeat(wards, len(diseases))
+    toggle_stays = np.full(len(toggle_wards), los)
+    toggle_flags = np.tile(current, (len(toggle_wards), 1))
+    toggled = np.tile(np.arange(len(diseases)), len(wards))
+    toggle_flags[np.arange(len(toggle_wards)), toggled] ^= 1
+
+    ward = np.concatenate([curve_wards, toggle_wards])
+    stay = np.concatenate([curve_stays, toggle_stays])
+    flags = np.vstack([curve_flags, toggle_flags])
+
+    frame = pd.DataFrame(flags, columns=diseases)
+    frame["age"] = age
+    frame["gender"] = gender
+    frame["admission_type"] = ward
+    frame["los"] = stay
+    base = cached_predict("hospital_bill", BILL_SPEC.build(frame, columns=feature_names)).astype(float)
+
+    admission = np.array([ADMISSION_CHARGES[name] for name in ward])
+    disease_cost = flags @ np.array(list(DISEASE_CHARGES.values()))
+    total = base + stay * STAY_CHARGE_PER_DAY + admission + disease_cost
+
+    n_curve = len(curve_stays)
+    curve = pd.DataFrame({
+        "Ward": curve_wards,
+        "Length of Stay": curve_stays,
+        "Base Charge": base[:n_curve],
+        "Hospital Total": total[:n_curve],
+    })
+    curve["Cost of Extra Day"] = curve.groupby("Ward")["Hospital Total"].diff()
+
+    reference = curve.loc[curve["Length of Stay"] == los].set_index("Ward")["Hospital Total"]
+    sensitivity = pd.DataFrame({
+        "Disease": np.array(diseases)[toggled],
+        "Ward": toggle_wards,
+        "Change": total[n_curve:] - reference.loc[toggle_wards].to_numpy(),
+    }).pivot(index="Disease", columns="Ward", values="Change")
+    sensitivity.insert(0, "Selected", [disease in selected_diseases for disease in sensitivity.index])
+    return curve, sensitivity
@@ -0,0 +1,275 @@
+"""Health campaign store: one row per assessed area plus its suggested diseases.
+
+Campaigns live in the ``campaigns`` table (indexed by city and by state,
+each with ``created_at``) and the suggested diseases in the normalized
+``campaign_diseases`` table. The old append-only ``health_campaigns.csv``
+is imported once by ``import_legacy_csv``; the ``data_imports`` table
+records that it happened so restarts do not import it again.
+
+Bulk mode scores a whole file of areas with one model call and applies
+the disease and risk rules as NumPy masks:
+
+    python -m hms.campaigns                          # import the legacy CSV
+    python -m hms.campaigns --plan areas.parquet --output plan.csv --save
+"""
+import argparse
+import ast
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from hms import db
+from hms.db import BASE_DIR
+from hms.features import POLLUTION_SPEC
+from hms.prediction_cache import cached_predict
+
+LEGACY_CSV = os.path.join(BASE_DIR, "health_campaigns.csv")
+POLLUTANTS = POLLUTION_SPEC.columns
+NO_RISK = "No significant health risks detected"
+
+# Column layout of the header-less legacy CSV written by pages/pollution_campaign.py
+LEGACY_COLUMNS = ["area", "city", "state", *POLLUTANTS, "risk_category", "diseases"]
+CAMPAIGN_COLUMNS = ["area", "city", "state", *POLLUTANTS, "predicted_aqi", "risk_category", "source", "created_at"]
+
+
+# -------- Rules --------
+# Disease -> [(reading, threshold), ...]; suggested when any reading exceeds its threshold
+DISEASE_RULES = [
+    ("Respiratory issues (Asthma, COPD, Allergies)", [("pm10", 100)]),
+    ("Bronchitis, Eye Irritation, Lung Damage", [("no2", 40), ("so2", 20)]),
+    ("Cardiovascular Disease, Headaches, Fatigue", [("co", 2)]),
+    ("Throat Irritation, Breathing Issues", [("ozone", 100)]),
+    ("Heatstroke, Dehydration", [("max_temp", 40)]),
+    ("Flu, Pneumonia, Bacterial Infections", [("humidity", 80)]),
+]
+# (AQI above, category), checked in order; anything lower is LOW_RISK
+RISK_LEVELS = [(300, "High Risk"), (150, "Moderate Risk")]
+LOW_RISK = "Low Risk"
+RISK_ORDER = {category: rank for rank, category in enumerate([c for _, c in RISK_LEVELS] + [LOW_RISK])}
+
+
+def suggest_diseases(pm10, no2, so2, co, ozone, temp, humidity):
+    """Diseases to screen for, given an area's pollutant and weather averages."""
+    readings = {"pm10": pm10, "no2": no2, "so2": so2, "co": co, "ozone": ozone, "max_temp": temp, "humidity": humidity}
+    diseases = [disease for disease, checks in DISEASE_RULES
+                if any(readings[column] > threshold for column, threshold in checks)]
+    return diseases if diseases else [NO_RISK]
+
+
+def classify_risk(predicted_value):
+    for threshold, category in RISK_LEVELS:
+        if predicted_value > threshold:
+            return category
+    return LOW_RISK
+
+
+def disease_masks(frame):
+    """Boolean (n_areas, n_diseases) matrix of DISEASE_RULES over a readings frame."""
+    return np.column_stack([
+        np.logical_or.reduce([frame[column].to_numpy(dtype=np.float64) > threshold for column, threshold in checks])
+        for _, checks in DISEASE_RULES
+    ])
+
+
+def classify_risks(predicted_aqi):
+    """Vectorized classify_risk over an array of predicted AQI values."""
+    aqi = np.asarray(predicted_aqi, dtype=np.float64)
+    return np.select([aqi > threshold for threshold, _ in RISK_LEVELS],
+                     [category for _, category in RISK_LEVELS], default=LOW_RISK)
+
+
+# -------- Bulk area scoring --------
+def column_key(name):
+    """Normalize a reading header: "PM2.5 AVG" -> "pm2_5"."""
+    key = str(name).strip().lower().replace(".", "_").replace(" ", "_")
+    return key[:-4] if key.endswith("_avg") else key
+
+
+def load_areas(source, name=None):
+    """Read a CSV or Parquet file of areas/stations into a readings frame.
+
+    Headers are matched loosely ("PM2.5 AVG", "pm2_5_avg" and "pm2_5" are
+    all accepted). Raises ValueError when the area name or a reading is missing.
+    """
+    name = name or getattr(source, "name", str(source))
+    frame = pd.read_parquet(source) if name.lower().endswith(".parquet") else pd.read_csv(source)
+    frame = frame.rename(columns=column_key)
+    for column in ("city", "state"):
+        if column not in frame:
+            frame[column] = ""
+    missing = [column for column in ("area", *POLLUTANTS) if column not in frame]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return frame
+
+
+def assess_areas(frame):
+    """Add predicted_aqi, risk_category, disease_count and diseases to a readings frame.
+
+    All rows go through the Pollution model in one call.
+    """
+    areas = frame[["area", "city", "state", *POLLUTANTS]].reset_index(drop=True)
+    areas["predicted_aqi"] = np.asarray(cached_predict("pollution", POLLUTION_SPEC.build(areas)), dtype=np.float64)
+    areas["risk_category"] = classify_risks(areas["predicted_aqi"])
+
+    masks = disease_masks(areas)
+    names = np.array([disease for disease, _ in DISEASE_RULES], dtype=object)
+    areas["disease_count"] = masks.sum(axis=1)
+    areas["diseases"] = [list(names[row]) or [NO_RISK] for row in masks]
+    return areas
+
+
+def plan_campaign(frame):
+    """Score every area and return a ranked campaign plan.
+
+    Areas are ordered by risk category, then predicted AQI, then the number
+    of suggested diseases. The plan keeps the readings, so it can be saved
+    with record_campaigns().
+    """
+    plan = assess_areas(frame)
+    plan["_risk_rank"] = plan["risk_category"].map(RISK_ORDER)
+    plan = plan.sort_values(["_risk_rank", "predicted_aqi", "disease_count"], ascending=[True, False, False])
+    plan = plan.drop(columns="_risk_rank").reset_index(drop=True)
+    plan.insert(0, "priority", np.arange(1, len(plan) + 1))
+    return plan
+
+
+# -------- Writes --------
+def record_campaigns(frame):
+    """Insert campaign rows and their diseases in one transaction.
+
+    ``frame`` has the CAMPAIGN_COLUMNS (``source`` and ``created_at`` are
+    optional) plus a ``diseases`` column of lists. Returns the new
+    campaign ids in row order.
+    """
+    frame = frame.copy()
+    if "source" not in frame:
+        frame["source"] = "form"
+    if "created_at" not in frame:
+        frame["created_at"] = datetime.now().isoformat(sep=" ", timespec="seconds")
+    if "predicted_aqi" not in frame:
+        frame["predicted_aqi"] = None
+    frame = frame.astype(object).where(frame.notna(), None)
+
+    insert = (f"INSERT INTO campaigns ({', '.join(CAMPAIGN_COLUMNS)}) "
+              f"VALUES ({', '.join('?' * len(CAMPAIGN_COLUMNS))})")
+    with db.transaction(immediate=True) as conn:
+        # SQLite assigns the AUTOINCREMENT ids; the prepared INSERT is reused per row
+        ids = [conn.execute(insert, row).lastrowid
+               for row in frame[CAMPAIGN_COLUMNS].itertuples(index=False, name=None)]
+        conn.executemany(
+            "INSERT OR IGNORE INTO campaign_diseases (campaign_id, disease) VALUES (?, ?)",
+            ((campaign_id, disease) for campaign_id, diseases in zip(ids, frame["diseases"])
+             for disease in diseases or () if disease != NO_RISK),
+        )
+    return ids
+
+
+def record_campaign(area, city, state, readings, predicted_aqi, risk_category, diseases):
+    """Store one assessed area; ``readings`` maps each POLLUTANTS name to its average."""
+    row = {"area": area, "city": city, "state": state, **readings,
+           "predicted_aqi": float(predicted_aqi), "risk_category": risk_category, "diseases": list(diseases)}
+    return record_campaigns(pd.DataFrame([row]))[0]
+
+
+def import_legacy_csv(path=LEGACY_CSV):
+    """Import the old append-only CSV once; returns rows imported (0 if already done or absent)."""
+    name = os.path.basename(path)
+    if not os.path.exists(path) or db.query_one("SELECT 1 FROM data_imports WHERE name = ?", (name,)):
+        return 0
+
+    frame = pd.read_csv(path, header=None, names=LEGACY_COLUMNS, on_bad_lines="skip")
+    frame["diseases"] = frame["diseases"].fillna("[]").map(ast.literal_eval)
+    frame["area"] = frame["area"].str.strip()
+    frame["source"] = "csv"
+    # The CSV has no timestamps or AQI; date the rows by the file itself
+    frame["created_at"] = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(sep=" ", timespec="seconds")
+
+    with db.transaction(immediate=True) as conn:
+        # Re-check under the write lock in case another process got here first
+        if conn.execute("SELECT 1 FROM data_imports WHERE name = ?", (name,)).fetchone():
+            return 0
+        record_campaigns(frame)
+        conn.execute("INSERT INTO data_imports (name, rows) VALUES (?, ?)", (name, len(frame)))
+    return len(frame)
+
+
+# -------- Reads --------
+def find_campaigns(city=None, state=None, start=None, end=None, limit=500):
+    """Campaigns for a city and/or state within [start, end), newest first.
+
+    Each filter is optional. Names match case-insensitively; ``diseases``
+    is a "; "-separated list.
+    """
+    filters, params = [], {"limit": limit}
+    for column, value in (("city", city), ("state", state)):
+        if value:
+            filters.append(f"c.{column} = :{column}")
+            params[column] = value.strip()
+    if start:
+        filters.append("c.created_at >= :start")
+        params["start"] = str(start)
+    if end:
+        filters.append("c.created_at < :end")
+        params["end"] = str(end)
+
+    return db.read_frame(f"""
+        SELECT c.*,
+               (SELECT group_concat(d.disease, '; ') FROM campaign_diseases d
+                WHERE d.campaign_id = c.campaign_id) AS diseases
+        FROM campaigns c
+        {"WHERE " + " AND ".join(filters) if filters else ""}
+        ORDER BY c.created_at DESC, c.campaign_id DESC
+        LIMIT :limit
+    """, params)
+
+
+# -------- Analytics --------
+# campaign_daily and campaign_disease_daily are kept current by triggers on
+# every insert (migration 11), so these never scan the campaigns table.
+def _rollup(table, group, start, end, state=None):
+    params = {"start": str(start), "end": str(end), "state": state.strip() if state else None}
+    return db.read_frame(f"""
+        SELECT day, state, city, {group}, campaigns, aqi_sum, aqi_count,
+               aqi_sum / NULLIF(aqi_count, 0) AS mean_aqi
+        FROM {table}
+        WHERE day >= :start AND day < :end AND (:state IS NULL OR state = :state)
+        ORDER BY day
+    """, params)
+
+
+def daily_summary(start, end, state=None):
+    """Campaign counts and AQI by day, state, city and risk category in [start, end)."""
+    return _rollup("campaign_daily", "risk_category", start, end, state)
+
+
+def disease_summary(start, end, state=None):
+    """Campaign counts and AQI by day, state, city and suggested disease in [start, end)."""
+    return _rollup("campaign_disease_daily", "disease", start, end, state)
+
+
+def rollup_states():
+    """States that have at least one campaign in the rollups, alphabetically."""
+    return [row[0] for row in db.query("SELECT DISTINCT state FROM campaign_daily ORDER BY state")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import legacy campaigns or plan a bulk campaign.")
+    parser.add_argument("--plan", metavar="FILE", help="CSV or Parquet of areas to score and rank")
+    parser.add_argument("--output", help="write the ranked plan to this CSV")
+    parser.add_argument("--save", action="store_true", help="store the scored areas as campaigns")
+    args = parser.parse_args()
+
+    if not args.plan:
+        imported = import_legacy_csv()
+        print(f"Imported {imported} campaigns from {LEGACY_CSV}" if imported else "Nothing to import")
+    else:
+        plan = plan_campaign(load_areas(args.plan))
+        if args.output:
+            plan.to_csv(args.output, index=False)
+        if args.save:
+            record_campaigns(plan.assign(source="bulk"))
+        print(plan[["priority", "area", "city", "state", "predicted_aqi", "risk_category", "disease_count"]]
+              .head(20).to_string(index=False))
@@ -0,0 +1,148 @@
+"""Shared SQLite access layer used by every HMS page."""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import streamlit as st
+
+from hms import migrations
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.environ.get("HMS_DB_PATH", os.path.join(BASE_DIR, "database", "hms_database.db"))
+
+POOL_SIZE = 8
+STATEMENT_CACHE_SIZE = 256
+
+# Applied to every new connection before it enters the pool
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",        # readers never block the single writer
+    "PRAGMA synchronous=NORMAL",      # safe with WAL, avoids an fsync per commit
+    "PRAGMA cache_size=-16000",       # ~16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",     # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",       # wait for the write lock instead of failing
+)
+
+
+class ConnectionPool:
+    """Bounded pool of warm connections, one borrowed per thread at a time."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._local = threading.local()
+
+    def _connect(self):
+        # isolation_level=None: statements autocommit unless wrapped in transaction()
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@st.cache_resource
+def get_pool():
+    """Process-wide pool, created once and shared by all sessions.
+
+    Pending schema migrations are applied here, so they run once per process.
+    """
+    pool = ConnectionPool(DB_PATH)
+    conn = pool.acquire()
+    try:
+        migrations.migrate(conn)
+    finally:
+        pool.release(conn)
+    return pool
+
+
+@contextmanager
+def connection():
+    """Borrow the calling thread's connection (nested calls reuse it)."""
+    pool = get_pool()
+    conn = getattr(pool._local, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+
+    conn = pool.acquire()
+    pool._local.conn = conn
+    try:
+        yield conn
+    finally:
+        pool._local.conn = None
+        pool.release(conn)
+
+
+@contextmanager
+def transaction(immediate=False):
+    """Run the block in one transaction; joins an already open one."""
+    with connection() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def query(sql, params=()):
+    """Return all rows of a SELECT as sqlite3.Row objects."""
+    with connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def query_one(sql, params=()):
+    """Return the first row of a SELECT, or None."""
+    with connection() as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def execute(sql, params=()):
+    """Run a single write statement and return its cursor."""
+    with connection() as conn:
+        return conn.execute(sql, params)
+
+
+def executemany(sql, seq_of_params):
+    """Run one statement for many parameter sets inside a single transaction."""
+    with transaction() as conn:
+        return conn.executemany(sql, seq_of_params)
+
+
+def read_frame(sql, params=()):
+    """Run a SELECT and return the result as a pandas DataFrame."""
+    import pandas as pd
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
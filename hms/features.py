@@ -0,0 +1,159 @@
+"""Declarative feature specs shared by the pages and the batch scorers.
+
+Each model has one ``FeatureSpec`` listing its input columns in training
+order: which source field feeds each column, how it is encoded and what
+to use when it is missing. ``spec.build(rows)`` accepts a single dict (a
+form or a ``patients`` row) or a whole DataFrame and encodes every column
+with vectorized pandas operations.
+
+Stored ``patients`` values are mixed ("Yes"/"No" text from the add-patient
+form, 1/0 from later columns), so flags accept both spellings.
+"""
+import numpy as np
+import pandas as pd
+
+NUMERIC = "numeric"
+FLAG = "flag"
+CATEGORY = "category"
+
+YES_VALUES = ("yes", "y", "true", "1", "1.0")
+
+
+class Feature:
+    """One model input column.
+
+    ``kind`` is NUMERIC (coerced to float, ``default`` when missing), FLAG
+    (yes/true/1 -> 1, anything else -> 0) or CATEGORY (1 when the
+    case-insensitive value is one of ``positive``, else 0).
+    """
+
+    def __init__(self, name, source=None, kind=NUMERIC, default=0.0, positive=()):
+        self.name = name
+        self.source = source or name
+        self.kind = kind
+        self.default = default
+        self.positive = tuple(value.lower() for value in ((positive,) if isinstance(positive, str) else positive))
+
+    def encode(self, column):
+        if self.kind == NUMERIC:
+            return pd.to_numeric(column, errors="coerce").fillna(self.default).astype(np.float64)
+        text = column.astype(str).str.strip().str.lower()
+        matches = self.positive if self.kind == CATEGORY else YES_VALUES
+        return text.isin(matches).astype(np.int64)
+
+
+class FeatureSpec:
+    """Ordered feature list for one model; ``as_frame`` keeps column names."""
+
+    def __init__(self, name, features, as_frame=False):
+        self.name = name
+        self.features = features
+        self.as_frame = as_frame
+
+    @property
+    def columns(self):
+        return [feature.name for feature in self.features]
+
+    @property
+    def sources(self):
+        return list(dict.fromkeys(feature.source for feature in self.features))
+
+    def build(self, rows, columns=None):
+        """Encode ``rows`` (dict, list of dicts or DataFrame) into model input.
+
+        Returns a float matrix, or a DataFrame when the model was trained on
+        named columns. ``columns`` reorders the frame to a trained column
+        list, filling any extra columns with 0.
+        """
+        frame = _as_frame(rows)
+        missing = pd.Series(np.nan, index=frame.index)
+        encoded = pd.DataFrame(
+            {feature.name: feature.encode(frame[feature.source] if feature.source in frame else missing)
+             for feature in self.features},
+            index=frame.index,
+        )
+        if columns is not None:
+            encoded = encoded.reindex(columns=columns, fill_value=0)
+        return encoded if self.as_frame else encoded.to_numpy(dtype=np.float64)
+
+
+def _as_frame(rows):
+    if isinstance(rows, pd.DataFrame):
+        return rows
+    if isinstance(rows, dict) or hasattr(rows, "keys"):
+        return pd.DataFrame([dict(rows)])
+    return pd.DataFrame([dict(row) for row in rows])
+
+
+def is_yes(value):
+    """Scalar version of the FLAG encoding, for pre-filling form widgets."""
+    return str(value).strip().lower() in YES_VALUES
+
+
+# -------- Model specs --------
+def _flags(*names):
+    return [Feature(name, kind=FLAG) for name in names]
+
+
+# Length of stay (ICU Random Forest and Ward XGBoost); defaults match the LOS form
+LOS_SPEC = FeatureSpec("los", [
+    Feature("HB", default=50.0),
+    Feature("TLC", default=50.0),
+    Feature("platelets", default=100.0),
+    Feature("glucose", default=50.0),
+    Feature("urea", default=50.0),
+    Feature("creatinine", default=1.0),
+    Feature("EF", default=50.0),
+    Feature("BNP", default=500.0),
+    Feature("age", default=50),
+    Feature("rural", kind=FLAG),
+    Feature("admission_type", kind=CATEGORY, positive="emergency"),
+    *_flags("CAD", "acs", "hfref", "stemi", "chb", "af", "vt", "uti",
+            "cardiogenic_shock", "shock", "pulmonary_embolism"),
+])
+
+# Cardiovascular risk (CVRA); missing labs fall back to typical adult values
+RISK_SPEC = FeatureSpec("cvra", [
+    Feature("age", default=50),
+    Feature("gender", kind=CATEGORY, positive=("male", "1")),
+    *_flags("smoking", "diabetes", "hypertension", "CAD"),
+    Feature("HB", default=13.0),
+    Feature("TLC", default=8000.0),
+    Feature("glucose", default=100.0),
+    Feature("urea", default=30.0),
+    Feature("creatinine", default=1.0),
+    Feature("BNP", default=100.0),
+    Feature("EF", default=55.0),
+])
+
+# Survival (trained on a named DataFrame); Emergency is 0, OPD is 1
+SURVIVAL_SPEC = FeatureSpec("survival", [
+    Feature("age", default=0),
+    Feature("gender", kind=CATEGORY, positive=("male", "1")),
+    Feature("type_of_admission", "admission_type", kind=CATEGORY, positive="opd"),
+    Feature("smoking", kind=FLAG),
+    Feature("alcohol", kind=FLAG),
+    Feature("htn", "hypertension", kind=FLAG),
+    Feature("dm", "diabetes", kind=FLAG),
+    Feature("cad", "CAD", kind=FLAG),
+    *_flags("prior_cmp", "ckd", "heart_failure", "hfref", "hfnef"),
+], as_frame=True)
+
+# Hospital bill (trained on a named DataFrame; reindex to feature_names.pkl)
+BILL_DISEASES = [
+    "STEMI", "ACS", "Heart Failure", "CVA Infarct", "DVT", "Shock", "Pulmonary Embolism", "AKI",
+    "VT", "CHB", "Severe Chest Infection", "Cardiogenic Shock", "CVA Bleed", "Infective Endocarditis",
+]
+BILL_SPEC = FeatureSpec("hospital_bill", [
+    Feature("Age", "age"),
+    Feature("Gender_Female", "gender", kind=CATEGORY, positive=("female",)),
+    Feature("Admission_Type_ICU", "admission_type", kind=CATEGORY, positive=("icu",)),
+    Feature("Length_of_Stay", "los", default=1),
+    *_flags(*BILL_DISEASES),
+], as_frame=True)
+
+# Pollution AQI model, from area averages
+POLLUTION_SPEC = FeatureSpec("pollution", [
+    Feature("pm2_5"), Feature("pm10"), Feature("no2"), Feature("nh3"), Feature("so2"),
+    Feature("co"), Feature("ozone"), Feature("max_temp"), Feature("min_temp"), Feature("humidity"),
+])
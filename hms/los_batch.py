@@ -0,0 +1,69 @@
+"""Batch length-of-stay scoring for every currently admitted patient.
+
+Reads all bed assignments joined with their patient rows, builds the
+22-column LOS feature matrix in one vectorized pass, runs a single
+``predict`` per ward model (ICU: Random Forest, Ward: XGBoost) and stores
+the results in ``los_predictions``.
+
+Run every morning with ``python -m hms.los_batch``.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from hms import db
+from hms.features import LOS_SPEC
+from hms.model_registry import get_registry
+from hms.prediction_cache import cached_predict
+
+WARD_MODELS = {"ICU": "los_icu", "Ward": "los_ward"}
+
+
+def load_census():
+    """All admitted patients with their ward."""
+    return db.read_frame("""
+        SELECT p.*, b.ward_type
+        FROM patient_beds b JOIN patients p ON p.patient_id = b.patient_id
+    """)
+
+
+def score_census():
+    """Score every admitted patient and persist the predictions.
+
+    Returns a DataFrame of patient_id, ward_type, predicted_los,
+    model_name, model_version and scored_at.
+    """
+    census = load_census()
+    features = LOS_SPEC.build(census)
+    wards = census["ward_type"].to_numpy()
+    scored_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+    registry = get_registry()
+
+    results = []
+    for ward_type, model_name in WARD_MODELS.items():
+        mask = wards == ward_type
+        if not mask.any():
+            continue
+        results.append(pd.DataFrame({
+            "patient_id": census["patient_id"].to_numpy()[mask],
+            "ward_type": ward_type,
+            "predicted_los": cached_predict(model_name, features[mask]).astype(float),
+            "model_name": model_name,
+            "model_version": registry.version(model_name),
+            "scored_at": scored_at,
+        }))
+
+    columns = ["patient_id", "ward_type", "predicted_los", "model_name", "model_version", "scored_at"]
+    predictions = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=columns)
+    db.executemany(
+        f"INSERT INTO los_predictions ({', '.join(columns)}) VALUES (?, ?, ?, ?, ?, ?)",
+        predictions[columns].itertuples(index=False, name=None),
+    )
+    return predictions
+
+
+if __name__ == "__main__":
+    predictions = score_census()
+    print(f"Scored {len(predictions)} admitted patients")
+    if len(predictions):
+        print(predictions.groupby("ward_type")["predicted_los"].describe().round(2).to_string())
@@ -0,0 +1,531 @@
+"""Numbered schema migrations, applied once per process when the pool opens.
+
+Add new schema changes by appending a migration with the next version
+number; never edit a migration that has already shipped.
+
+Run ``python -m hms.migrations`` to apply pending migrations by hand.
+"""
+
+# (version, description, statements); each migration runs in one transaction
+MIGRATIONS = [
+    (1, "baseline schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT UNIQUE,
+            password TEXT,
+            role TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS patients (
+            patient_id TEXT PRIMARY KEY,
+            name TEXT,
+            age INTEGER,
+            gender TEXT,
+            smoking TEXT,
+            diabetes TEXT,
+            hypertension TEXT,
+            CAD TEXT,
+            admission_type TEXT,
+            HB REAL,
+            TLC REAL,
+            glucose REAL,
+            urea REAL,
+            creatinine REAL,
+            BNP REAL,
+            EF REAL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS billing (
+            patient_id TEXT PRIMARY KEY,
+            pharmacy_total REAL DEFAULT 0,
+            hospital_total REAL DEFAULT 0,
+            grand_total REAL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS hospital_beds (
+            ward_type TEXT PRIMARY KEY,
+            total_beds INTEGER,
+            occupied_beds INTEGER,
+            available_beds INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS patient_beds (
+            patient_id TEXT PRIMARY KEY,
+            ward_type TEXT,
+            bed_assigned INTEGER,
+            assigned_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS medical_records (
+            record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id TEXT NOT NULL,
+            visit_date DATE NOT NULL,
+            diagnosis TEXT NOT NULL,
+            treatment TEXT,
+            prescriptions TEXT,
+            lab_results TEXT,
+            notes TEXT,
+            FOREIGN KEY (patient_id) REFERENCES patients(patient_id)
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO hospital_beds (ward_type, total_beds, occupied_beds, available_beds)
+        VALUES ('ICU', 50, 46, 4), ('Ward', 100, 85, 15)
+        """,
+    ]),
+    (2, "LOS clinical columns on patients", [
+        "ALTER TABLE patients ADD COLUMN platelets REAL",
+        "ALTER TABLE patients ADD COLUMN rural INTEGER",
+        "ALTER TABLE patients ADD COLUMN acs INTEGER",
+        "ALTER TABLE patients ADD COLUMN hfref INTEGER",
+        "ALTER TABLE patients ADD COLUMN stemi INTEGER",
+        "ALTER TABLE patients ADD COLUMN chb INTEGER",
+        "ALTER TABLE patients ADD COLUMN af INTEGER",
+        "ALTER TABLE patients ADD COLUMN vt INTEGER",
+        "ALTER TABLE patients ADD COLUMN uti INTEGER",
+        "ALTER TABLE patients ADD COLUMN cardiogenic_shock INTEGER",
+        "ALTER TABLE patients ADD COLUMN shock INTEGER",
+        "ALTER TABLE patients ADD COLUMN pulmonary_embolism INTEGER",
+    ]),
+    (3, "lookup indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_patient_beds_ward ON patient_beds (ward_type)",
+        "CREATE INDEX IF NOT EXISTS idx_medical_records_patient ON medical_records (patient_id)",
+    ]),
+    (4, "per-bed inventory with trigger-maintained ward counters", [
+        """
+        CREATE TABLE beds (
+            bed_id INTEGER PRIMARY KEY,
+            ward_type TEXT NOT NULL REFERENCES hospital_beds(ward_type),
+            status TEXT NOT NULL DEFAULT 'free' CHECK (status IN ('free', 'occupied')),
+            patient_id TEXT UNIQUE
+        )
+        """,
+        # Free-bed pool: assignment picks the lowest free bed id per ward
+        "CREATE INDEX idx_beds_free ON beds (ward_type, bed_id) WHERE status = 'free'",
+        # One free row per bed from the existing totals
+        """
+        INSERT INTO beds (ward_type, status)
+        WITH RECURSIVE n(i) AS (
+            SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < (SELECT MAX(total_beds) FROM hospital_beds)
+        )
+        SELECT h.ward_type, 'free'
+        FROM hospital_beds h JOIN n ON n.i <= h.total_beds
+        ORDER BY h.ward_type, n.i
+        """,
+        # Only patients actually tracked in patient_beds occupy a bed; the old
+        # counters' anonymous occupancy could never be discharged, so it is dropped
+        """
+        WITH p AS (
+            SELECT patient_id, ward_type, ROW_NUMBER() OVER (PARTITION BY ward_type ORDER BY assigned_at) AS rn
+            FROM patient_beds
+        ), b AS (
+            SELECT bed_id, ward_type, ROW_NUMBER() OVER (PARTITION BY ward_type ORDER BY bed_id) AS rn
+            FROM beds
+        ), m AS (
+            SELECT b.bed_id, p.patient_id FROM p JOIN b USING (ward_type, rn)
+        )
+        UPDATE beds SET status = 'occupied', patient_id = (SELECT patient_id FROM m WHERE m.bed_id = beds.bed_id)
+        WHERE bed_id IN (SELECT bed_id FROM m)
+        """,
+        """
+        UPDATE patient_beds
+        SET bed_assigned = (SELECT bed_id FROM beds WHERE beds.patient_id = patient_beds.patient_id)
+        """,
+        # Start the counters from the beds; the triggers below keep them in step
+        """
+        UPDATE hospital_beds SET
+            occupied_beds = (SELECT COUNT(*) FROM beds b WHERE b.ward_type = hospital_beds.ward_type AND b.status = 'occupied'),
+            available_beds = (SELECT COUNT(*) FROM beds b WHERE b.ward_type = hospital_beds.ward_type AND b.status = 'free')
+        """,
+        """
+        CREATE TRIGGER beds_after_insert AFTER INSERT ON beds
+        BEGIN
+            UPDATE hospital_beds
+            SET total_beds = total_beds + 1,
+                occupied_beds = occupied_beds + (NEW.status = 'occupied'),
+                available_beds = available_beds + (NEW.status = 'free')
+            WHERE ward_type = NEW.ward_type;
+        END
+        """,
+        """
+        CREATE TRIGGER beds_after_delete AFTER DELETE ON beds
+        BEGIN
+            UPDATE hospital_beds
+            SET total_beds = total_beds - 1,
+                occupied_beds = occupied_beds - (OLD.status = 'occupied'),
+                available_beds = available_beds - (OLD.status = 'free')
+            WHERE ward_type = OLD.ward_type;
+        END
+        """,
+        """
+        CREATE TRIGGER beds_after_status_update AFTER UPDATE OF status ON beds
+        WHEN OLD.status <> NEW.status
+        BEGIN
+            UPDATE hospital_beds
+            SET occupied_beds = occupied_beds + (NEW.status = 'occupied') - (OLD.status = 'occupied'),
+                available_beds = available_beds + (NEW.status = 'free') - (OLD.status = 'free')
+            WHERE ward_type = NEW.ward_type;
+        END
+        """,
+    ]),
+    (5, "itemized billing ledger", [
+        """
+        CREATE TABLE bill_items (
+            item_id INTEGER PRIMARY KEY,
+            bill_id TEXT NOT NULL,
+            patient_id TEXT NOT NULL,
+            category TEXT NOT NULL CHECK (category IN ('pharmacy', 'hospital', 'disease')),
+            item TEXT NOT NULL,
+            amount REAL NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        "CREATE INDEX idx_bill_items_bill ON bill_items (bill_id)",
+        "CREATE INDEX idx_bill_items_patient ON bill_items (patient_id, created_at)",
+        "CREATE INDEX idx_bill_items_created ON bill_items (created_at, category)",
+        "ALTER TABLE billing ADD COLUMN bill_id TEXT",
+        "ALTER TABLE billing ADD COLUMN updated_at TIMESTAMP",
+        "CREATE INDEX idx_billing_bill ON billing (bill_id)",
+    ]),
+    (6, "batch LOS predictions", [
+        """
+        CREATE TABLE los_predictions (
+            prediction_id INTEGER PRIMARY KEY,
+            patient_id TEXT NOT NULL,
+            ward_type TEXT NOT NULL,
+            predicted_los REAL NOT NULL,
+            model_name TEXT NOT NULL,
+            model_version TEXT NOT NULL,
+            scored_at TIMESTAMP NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_los_predictions_patient ON los_predictions (patient_id, scored_at)",
+    ]),
+    (7, "cohort cardiovascular risk scores", [
+        """
+        CREATE TABLE risk_scores (
+            patient_id TEXT PRIMARY KEY,
+            probability REAL NOT NULL,
+            high_risk INTEGER NOT NULL,
+            model_version TEXT NOT NULL,
+            scored_at TIMESTAMP NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_risk_scores_probability ON risk_scores (probability DESC)",
+    ]),
+    (8, "survival model inputs and incremental survival scores", [
+        "ALTER TABLE patients ADD COLUMN alcohol INTEGER",
+        "ALTER TABLE patients ADD COLUMN prior_cmp INTEGER",
+        "ALTER TABLE patients ADD COLUMN ckd INTEGER",
+        "ALTER TABLE patients ADD COLUMN heart_failure INTEGER",
+        "ALTER TABLE patients ADD COLUMN hfnef INTEGER",
+        """
+        CREATE TABLE survival_scores (
+            patient_id TEXT PRIMARY KEY,
+            input_hash TEXT NOT NULL,
+            high_survival INTEGER NOT NULL,
+            model_version TEXT NOT NULL,
+            scored_at TIMESTAMP NOT NULL
+        )
+        """,
+    ]),
+    (9, "health campaigns, normalized campaign diseases and one-time imports", [
+        """
+        CREATE TABLE campaigns (
+            campaign_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            area TEXT NOT NULL COLLATE NOCASE,
+            city TEXT NOT NULL COLLATE NOCASE,
+            state TEXT NOT NULL COLLATE NOCASE,
+            pm2_5 REAL, pm10 REAL, no2 REAL, nh3 REAL, so2 REAL, co REAL, ozone REAL,
+            max_temp REAL, min_temp REAL, humidity REAL,
+            predicted_aqi REAL,
+            risk_category TEXT NOT NULL,
+            source TEXT NOT NULL DEFAULT 'form',
+            created_at TIMESTAMP NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_campaigns_city ON campaigns (city, created_at)",
+        "CREATE INDEX idx_campaigns_state ON campaigns (state, created_at)",
+        """
+        CREATE TABLE campaign_diseases (
+            campaign_id INTEGER NOT NULL REFERENCES campaigns(campaign_id),
+            disease TEXT NOT NULL,
+            PRIMARY KEY (campaign_id, disease)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX idx_campaign_diseases_disease ON campaign_diseases (disease, campaign_id)",
+        """
+        CREATE TABLE data_imports (
+            name TEXT PRIMARY KEY,
+            rows INTEGER NOT NULL,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (10, "air-quality stream readings and file offsets", [
+        """
+        CREATE TABLE aq_readings (
+            reading_id INTEGER PRIMARY KEY,
+            area TEXT NOT NULL,
+            city TEXT NOT NULL,
+            state TEXT NOT NULL,
+            read_at TIMESTAMP NOT NULL,
+            pm2_5 REAL, pm10 REAL, no2 REAL, nh3 REAL, so2 REAL, co REAL, ozone REAL,
+            max_temp REAL, min_temp REAL, humidity REAL
+        )
+        """,
+        "CREATE INDEX idx_aq_readings_read_at ON aq_readings (read_at)",
+        """
+        CREATE TABLE aq_stream_offsets (
+            path TEXT PRIMARY KEY,
+            offset INTEGER NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+        """,
+    ]),
+    (11, "trigger-maintained daily campaign rollups", [
+        """
+        CREATE TABLE campaign_daily (
+            day TEXT NOT NULL,
+            state TEXT NOT NULL COLLATE NOCASE,
+            city TEXT NOT NULL COLLATE NOCASE,
+            risk_category TEXT NOT NULL,
+            campaigns INTEGER NOT NULL,
+            aqi_sum REAL NOT NULL,
+            aqi_count INTEGER NOT NULL,
+            PRIMARY KEY (day, state, city, risk_category)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE campaign_disease_daily (
+            day TEXT NOT NULL,
+            state TEXT NOT NULL COLLATE NOCASE,
+            city TEXT NOT NULL COLLATE NOCASE,
+            disease TEXT NOT NULL,
+            campaigns INTEGER NOT NULL,
+            aqi_sum REAL NOT NULL,
+            aqi_count INTEGER NOT NULL,
+            PRIMARY KEY (day, state, city, disease)
+        ) WITHOUT ROWID
+        """,
+        # Backfill from the campaigns recorded so far
+        """
+        INSERT INTO campaign_daily
+        SELECT date(created_at), state, city, risk_category, COUNT(*), TOTAL(predicted_aqi), COUNT(predicted_aqi)
+        FROM campaigns GROUP BY 1, 2, 3, 4
+        """,
+        """
+        INSERT INTO campaign_disease_daily
+        SELECT date(c.created_at), c.state, c.city, d.disease, COUNT(*), TOTAL(c.predicted_aqi), COUNT(c.predicted_aqi)
+        FROM campaign_diseases d JOIN campaigns c USING (campaign_id) GROUP BY 1, 2, 3, 4
+        """,
+        """
+        CREATE TRIGGER campaigns_after_insert AFTER INSERT ON campaigns
+        BEGIN
+            INSERT INTO campaign_daily VALUES (
+                date(NEW.created_at), NEW.state, NEW.city, NEW.risk_category,
+                1, COALESCE(NEW.predicted_aqi, 0), NEW.predicted_aqi IS NOT NULL
+            )
+            ON CONFLICT (day, state, city, risk_category) DO UPDATE SET
+                campaigns = campaigns + 1,
+                aqi_sum = aqi_sum + excluded.aqi_sum,
+                aqi_count = aqi_count + excluded.aqi_count;
+        END
+        """,
+        """
+        CREATE TRIGGER campaigns_after_delete AFTER DELETE ON campaigns
+        BEGIN
+            UPDATE campaign_daily
+            SET campaigns = campaigns - 1,
+                aqi_sum = aqi_sum - COALESCE(OLD.predicted_aqi, 0),
+                aqi_count = aqi_count - (OLD.predicted_aqi IS NOT NULL)
+            WHERE day = date(OLD.created_at) AND state = OLD.state AND city = OLD.city
+              AND risk_category = OLD.risk_category;
+            DELETE FROM campaign_daily
+            WHERE day = date(OLD.created_at) AND state = OLD.state AND city = OLD.city
+              AND risk_category = OLD.risk_category AND campaigns <= 0;
+        END
+        """,
+        # Disease rows are written after their campaign, so the campaign can be looked up
+        """
+        CREATE TRIGGER campaign_diseases_after_insert AFTER INSERT ON campaign_diseases
+        BEGIN
+            INSERT INTO campaign_disease_daily
+            SELECT date(created_at), state, city, NEW.disease,
+                   1, COALESCE(predicted_aqi, 0), predicted_aqi IS NOT NULL
+            FROM campaigns WHERE campaign_id = NEW.campaign_id
+            ON CONFLICT (day, state, city, disease) DO UPDATE SET
+                campaigns = campaigns + 1,
+                aqi_sum = aqi_sum + excluded.aqi_sum,
+                aqi_count = aqi_count + excluded.aqi_count;
+        END
+        """,
+        """
+        CREATE TRIGGER campaign_diseases_after_delete AFTER DELETE ON campaign_diseases
+        BEGIN
+            UPDATE campaign_disease_daily
+            SET campaigns = campaigns - 1,
+                aqi_sum = aqi_sum - COALESCE((SELECT predicted_aqi FROM campaigns WHERE campaign_id = OLD.campaign_id), 0),
+                aqi_count = aqi_count - (SELECT predicted_aqi IS NOT NULL FROM campaigns WHERE campaign_id = OLD.campaign_id)
+            WHERE (day, state, city) = (SELECT date(created_at), state, city FROM campaigns WHERE campaign_id = OLD.campaign_id)
+              AND disease = OLD.disease;
+            DELETE FROM campaign_disease_daily WHERE disease = OLD.disease AND campaigns <= 0;
+        END
+        """,
+        # The disease trigger above looks up the parent campaign, so deleting a
+        # campaign deletes its diseases first, while it still exists
+        """
+        CREATE TRIGGER campaigns_before_delete BEFORE DELETE ON campaigns
+        BEGIN
+            DELETE FROM campaign_diseases WHERE campaign_id = OLD.campaign_id;
+        END
+        """,
+    ]),
+    (12, "bed state change counter for polling clients", [
+        """
+        CREATE TABLE bed_state_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """,
+        "INSERT INTO bed_state_version (id, version) VALUES (1, 0)",
+        """
+        CREATE TRIGGER beds_version_after_insert AFTER INSERT ON beds
+        BEGIN
+            UPDATE bed_state_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER beds_version_after_delete AFTER DELETE ON beds
+        BEGIN
+            UPDATE bed_state_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER beds_version_after_update AFTER UPDATE OF ward_type, status, patient_id ON beds
+        BEGIN
+            UPDATE bed_state_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+    ]),
+    (13, "full-text search index over medical records", [
+        # External-content FTS5 table: stores only the index, text stays in medical_records
+        """
+        CREATE VIRTUAL TABLE medical_records_fts USING fts5(
+            diagnosis, treatment, prescriptions, lab_results, notes,
+            content = 'medical_records', content_rowid = 'record_id',
+            tokenize = 'porter unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER medical_records_fts_after_insert AFTER INSERT ON medical_records
+        BEGIN
+            INSERT INTO medical_records_fts (rowid, diagnosis, treatment, prescriptions, lab_results, notes)
+            VALUES (NEW.record_id, NEW.diagnosis, NEW.treatment, NEW.prescriptions, NEW.lab_results, NEW.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER medical_records_fts_after_delete AFTER DELETE ON medical_records
+        BEGIN
+            INSERT INTO medical_records_fts (medical_records_fts, rowid, diagnosis, treatment, prescriptions, lab_results, notes)
+            VALUES ('delete', OLD.record_id, OLD.diagnosis, OLD.treatment, OLD.prescriptions, OLD.lab_results, OLD.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER medical_records_fts_after_update
+        AFTER UPDATE OF diagnosis, treatment, prescriptions, lab_results, notes ON medical_records
+        BEGIN
+            INSERT INTO medical_records_fts (medical_records_fts, rowid, diagnosis, treatment, prescriptions, lab_results, notes)
+            VALUES ('delete', OLD.record_id, OLD.diagnosis, OLD.treatment, OLD.prescriptions, OLD.lab_results, OLD.notes);
+            INSERT INTO medical_records_fts (rowid, diagnosis, treatment, prescriptions, lab_results, notes)
+            VALUES (NEW.record_id, NEW.diagnosis, NEW.treatment, NEW.prescriptions, NEW.lab_results, NEW.notes);
+        END
+        """,
+        # Index the records written before this migration
+        "INSERT INTO medical_records_fts (medical_records_fts) VALUES ('rebuild')",
+    ]),
+    (14, "covering index for paged visit history", [
+        # Serves the visit list (patient, newest first, diagnosis) without touching the table
+        """
+        CREATE INDEX IF NOT EXISTS idx_medical_records_patient_visit
+        ON medical_records (patient_id, visit_date DESC, record_id DESC, diagnosis)
+        """,
+        # Its leading column makes the single-column index redundant
+        "DROP INDEX IF EXISTS idx_medical_records_patient",
+    ]),
+    (15, "case-folded patient names for prefix search", [
+        # name_key is lower(trim(name)), kept by triggers so every writer stays consistent
+        "ALTER TABLE patients ADD COLUMN name_key TEXT",
+        "UPDATE patients SET name_key = lower(trim(name))",
+        "CREATE INDEX IF NOT EXISTS idx_patients_name_key ON patients (name_key)",
+        """
+        CREATE TRIGGER patients_name_key_after_insert AFTER INSERT ON patients
+        BEGIN
+            UPDATE patients SET name_key = lower(trim(NEW.name)) WHERE patient_id = NEW.patient_id;
+        END
+        """,
+        """
+        CREATE TRIGGER patients_name_key_after_update AFTER UPDATE OF name ON patients
+        BEGIN
+            UPDATE patients SET name_key = lower(trim(NEW.name)) WHERE patient_id = NEW.patient_id;
+        END
+        """,
+    ]),
+]
+
+
+def current_version(conn):
+    """Highest applied migration version (0 for a fresh database)."""
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply all pending migrations and return the versions applied.
+
+    Expects an autocommit connection (isolation_level=None).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= current_version(conn):
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the lock
+            if conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                conn.execute("ROLLBACK")
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        applied.append(version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from hms import db
+
+    with db.connection() as conn:
+        print(f"Schema version: {current_version(conn)}")
@@ -0,0 +1,184 @@
+"""Central registry for the pickled prediction models.
+
+Models are resolved from one models directory (``HMS_MODELS_DIR``, default
+``<repo>/models``), unpickled lazily at most once per process and reloaded
+automatically when the file on disk changes.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+import streamlit as st
+
+from hms.db import BASE_DIR
+
+MODELS_DIR = os.environ.get("HMS_MODELS_DIR", os.path.join(BASE_DIR, "models"))
+
+# Registered model name -> pickle file inside MODELS_DIR
+MODEL_FILES = {
+    "cvra": "CVRA2.pkl",
+    "survival": "survival2.pkl",
+    "los_icu": "random_forest_icu.pkl",
+    "los_ward": "xgboost_ward.pkl",
+    "pollution": "Pollution.pkl",
+    "hospital_bill": "hospital_bill.pkl",
+}
+
+# Models whose training column order is pickled separately
+FEATURE_FILES = {
+    "hospital_bill": "feature_names.pkl",
+}
+
+
+class LoadedModel:
+    """An unpickled model plus the metadata of the file it came from."""
+
+    def __init__(self, name, path, model, feature_names, sha256, mtime_ns, size, load_seconds):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.feature_names = feature_names
+        self.sha256 = sha256
+        self.version = sha256[:12]
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+    def is_current(self, stat):
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+    def metadata(self):
+        return {
+            "name": self.name,
+            "path": self.path,
+            "version": self.version,
+            "sha256": self.sha256,
+            "type": type(self.model).__name__,
+            "feature_names": self.feature_names,
+            "load_seconds": round(self.load_seconds, 4),
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """Thread-safe, lazily loading model cache keyed by registered name."""
+
+    def __init__(self, models_dir=MODELS_DIR, model_files=MODEL_FILES, feature_files=FEATURE_FILES):
+        self.models_dir = models_dir
+        self.model_files = dict(model_files)
+        self.feature_files = dict(feature_files)
+        self._loaded = {}
+        self._compiled = {}
+        self._reload_listeners = []
+        # One lock per model so a slow unpickle does not block the others
+        self._locks = {name: threading.Lock() for name in self.model_files}
+
+    def names(self):
+        return list(self.model_files)
+
+    def add_reload_listener(self, callback):
+        """Call ``callback(name)`` whenever a loaded model is replaced by a newer file."""
+        self._reload_listeners.append(callback)
+
+    def path(self, name):
+        if name not in self.model_files:
+            raise KeyError(f"Unknown model '{name}'. Registered: {', '.join(self.model_files)}")
+        return os.path.join(self.models_dir, self.model_files[name])
+
+    def get(self, name):
+        """Return the LoadedModel for ``name``, (re)loading it if needed."""
+        path = self.path(name)
+        stat = os.stat(path)
+        entry = self._loaded.get(name)
+        if entry is not None and entry.is_current(stat):
+            return entry
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            stat = os.stat(path)
+            entry = self._loaded.get(name)
+            if entry is None or not entry.is_current(stat):
+                reloaded = entry is not None
+                entry = self._load(name, path, stat)
+                self._loaded[name] = entry
+                if reloaded:
+                    for callback in self._reload_listeners:
+                        callback(name)
+        return entry
+
+    def model(self, name):
+        return self.get(name).model
+
+    def metadata(self, name):
+        return self.get(name).metadata()
+
+    def is_loaded(self, name):
+        return name in self._loaded
+
+    def version(self, name):
+        """Version of the current model file (the compiled copy shares it)."""
+        compiled = self._current_compiled(name)
+        return compiled.version if compiled is not None else self.get(name).version
+
+    def predictor(self, name):
+        """Fastest up-to-date predictor for ``name``.
+
+        Returns the compiled NumPy ensemble from ``models/compiled`` when one
+        exists and was built from the current pickle, else the model itself.
+        """
+        compiled = self._current_compiled(name)
+        return compiled if compiled is not None else self.model(name)
+
+    def _current_compiled(self, name):
+        from hms.tree_compiler import CompiledEnsemble, compiled_path
+
+        path = compiled_path(name)
+        try:
+            source, target = os.stat(self.path(name)), os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        key = (source.st_mtime_ns, source.st_size, target.st_mtime_ns)
+        cached = self._compiled.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        with self._locks[name]:
+            compiled = CompiledEnsemble.load(path)
+            with open(self.path(name), "rb") as file:
+                source_sha256 = hashlib.sha256(file.read()).hexdigest()
+            # A compiled file from an older pickle is ignored until recompiled
+            if compiled.source_sha256 != source_sha256:
+                compiled = None
+            self._compiled[name] = (key, compiled)
+        return compiled
+
+    def _load(self, name, path, stat):
+        started = time.perf_counter()
+        with open(path, "rb") as file:
+            payload = file.read()
+        model = pickle.loads(payload)
+        feature_names = self._feature_names(name, model)
+        return LoadedModel(
+            name, path, model, feature_names,
+            sha256=hashlib.sha256(payload).hexdigest(),
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            load_seconds=time.perf_counter() - started,
+        )
+
+    def _feature_names(self, name, model):
+        if name in self.feature_files:
+            with open(os.path.join(self.models_dir, self.feature_files[name]), "rb") as file:
+                return list(pickle.load(file))
+        names = getattr(model, "feature_names_in_", None)
+        return list(names) if names is not None else None
+
+
+@st.cache_resource
+def get_registry():
+    """Process-wide registry shared by all sessions and batch jobs."""
+    return ModelRegistry()
@@ -0,0 +1,107 @@
+"""Per-patient context shared by the pages, loaded in one query and cached.
+
+A context is the patient row (demographics, history, labs) plus the
+current bed, the current bill totals and the most recent visits, as a
+dict. It is cached process-wide so every session and page working on the
+same case reuses it; every write path in the app calls
+``invalidate_patient`` after committing. Writes from other processes
+(batch jobs, the CLI) are picked up when the entry's TTL runs out.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from hms import db
+
+MAX_ENTRIES = 2000
+TTL_SECONDS = 5 * 60
+RECENT_RECORDS = 5
+
+
+def load_patient_context(patient_id, recent=RECENT_RECORDS):
+    """The patient's context straight from the database (None if unknown)."""
+    row = db.query_one("""
+        SELECT p.*,
+               b.ward_type, b.bed_assigned, b.assigned_at,
+               bl.pharmacy_total, bl.hospital_total, bl.grand_total, bl.updated_at AS billed_at,
+               (SELECT json_group_array(json_object('record_id', r.record_id, 'visit_date', r.visit_date,
+                                                    'diagnosis', r.diagnosis))
+                FROM (SELECT record_id, visit_date, diagnosis FROM medical_records
+                      WHERE patient_id = p.patient_id
+                      ORDER BY visit_date DESC, record_id DESC LIMIT :recent) AS r) AS recent_records
+        FROM patients p
+        LEFT JOIN patient_beds b ON b.patient_id = p.patient_id
+        LEFT JOIN billing bl ON bl.patient_id = p.patient_id
+        WHERE p.patient_id = :patient_id
+    """, {"patient_id": patient_id, "recent": recent})
+    if row is None:
+        return None
+    context = dict(row)
+    context.pop("name_key", None)
+    context["recent_records"] = json.loads(context["recent_records"])
+    return context
+
+
+class PatientContextCache:
+    """Thread-safe bounded LRU of contexts with a per-entry time-to-live.
+
+    A load that overlaps an invalidation is not stored, so a reader racing
+    a writer can never put the pre-write context back.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._invalidations = 0
+
+    def get(self, patient_id):
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(patient_id)
+                return entry[1]
+            generation = self._invalidations
+
+        context = load_patient_context(patient_id)
+        if context is not None:
+            with self._lock:
+                if generation == self._invalidations:
+                    self._entries[patient_id] = (time.monotonic() + self.ttl_seconds, context)
+                    self._entries.move_to_end(patient_id)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return context
+
+    def invalidate(self, patient_id=None):
+        """Drop one patient's context, or every context."""
+        with self._lock:
+            self._invalidations += 1
+            if patient_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(patient_id, None)
+
+
+@st.cache_resource
+def get_context_cache():
+    """Process-wide patient context cache."""
+    return PatientContextCache()
+
+
+def get_patient_context(patient_id):
+    """Cached context for ``patient_id``; None when there is no such patient."""
+    if not patient_id:
+        return None
+    return get_context_cache().get(patient_id)
+
+
+def invalidate_patient(*patient_ids):
+    """Forget the cached context of each patient written to."""
+    cache = get_context_cache()
+    for patient_id in patient_ids:
+        cache.invalidate(patient_id)
@@ -0,0 +1,61 @@
+"""Patient lookup by name or partial ID, and survival history updates.
+
+Both searches are prefix range scans on an index: ``patient_id`` is the
+primary key and ``name_key`` is the trigger-maintained ``lower(trim(name))``
+(migration 15). The typed prefix is folded with the same SQL ``lower()``,
+so the two sides always agree.
+
+    python -m hms.patients ra
+"""
+import argparse
+
+from hms import db
+from hms.patient_context import invalidate_patient
+
+MAX_MATCHES = 10
+# History flags only the survival model uses (migration 8, plus hfref from migration 2)
+SURVIVAL_HISTORY = ("alcohol", "prior_cmp", "ckd", "heart_failure", "hfref", "hfnef")
+# Sorts after every character, so [prefix, prefix || PREFIX_END) covers all extensions
+PREFIX_END = "char(1114111)"
+
+
+def search_patients(text, limit=MAX_MATCHES):
+    """Patients whose name or ID starts with ``text``, as (patient_id, name, age, gender) rows."""
+    prefix = " ".join(text.split())
+    if not prefix:
+        return []
+    return db.query(f"""
+        WITH by_id AS (
+            SELECT patient_id FROM patients
+            WHERE patient_id >= lower(:prefix) AND patient_id < lower(:prefix) || {PREFIX_END}
+            ORDER BY patient_id LIMIT :limit
+        ),
+        by_name AS (
+            SELECT patient_id FROM patients
+            WHERE name_key >= lower(:prefix) AND name_key < lower(:prefix) || {PREFIX_END}
+            ORDER BY name_key LIMIT :limit
+        )
+        SELECT patient_id, name, age, gender FROM patients
+        WHERE patient_id IN (SELECT patient_id FROM by_id UNION SELECT patient_id FROM by_name)
+        ORDER BY name_key, patient_id
+        LIMIT :limit
+    """, {"prefix": prefix, "limit": limit})
+
+
+def save_survival_history(patient_id, values):
+    """Store the SURVIVAL_HISTORY flags (0/1) so batch survival scoring sees them."""
+    db.execute(
+        f"UPDATE patients SET {', '.join(f'{column} = ?' for column in SURVIVAL_HISTORY)} WHERE patient_id = ?",
+        (*(int(values[column]) for column in SURVIVAL_HISTORY), patient_id),
+    )
+    invalidate_patient(patient_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find patients by name or ID prefix.")
+    parser.add_argument("prefix")
+    parser.add_argument("--limit", type=int, default=MAX_MATCHES)
+    args = parser.parse_args()
+
+    for row in search_patients(args.prefix, args.limit):
+        print(*row, sep="\t")
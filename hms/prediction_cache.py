@@ -0,0 +1,119 @@
+"""Shared memoization of model predictions keyed on feature vectors.
+
+Each input row is cached separately under (model name, model version,
+method, hash of the row's values). A batch call predicts only the rows
+that miss, in a single call, so the same cache serves the pages and the
+batch scorers. The version in the key, plus a reload listener on the
+registry, makes sure a changed model file never returns stale results.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+
+from hms.model_registry import get_registry
+
+MAX_ENTRIES = 20000
+TTL_SECONDS = 6 * 60 * 60
+
+# Above this many uncached rows, batch through the original model (which
+# parallelizes large batches) instead of the single-row compiled path
+LARGE_BATCH_ROWS = 256
+
+
+class PredictionCache:
+    """Thread-safe bounded LRU with a per-entry time-to-live."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def row_keys(model_name, version, method, X):
+        rows = np.ascontiguousarray(np.asarray(X, dtype=np.float64).reshape(len(X), -1))
+        return [
+            (model_name, version, method, hashlib.blake2b(row.tobytes(), digest_size=16).digest())
+            for row in rows
+        ]
+
+    def get_many(self, keys):
+        """Cached values for ``keys`` (None where missing or expired)."""
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    values.append(None)
+                    self.misses += 1
+        return values
+
+    def put_many(self, keys, values):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, model_name=None):
+        """Drop every entry, or only those of one model."""
+        with self._lock:
+            if model_name is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == model_name]:
+                del self._entries[key]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+@st.cache_resource
+def get_cache():
+    """Process-wide prediction cache, cleared per model when its file reloads."""
+    cache = PredictionCache()
+    get_registry().add_reload_listener(cache.invalidate)
+    return cache
+
+
+def cached_predict(name, X, method="predict"):
+    """``predictor.<method>(X)`` for a registered model, memoized per row."""
+    if len(X) == 0:
+        # Nothing to key or predict (e.g. an upload with only a header row)
+        return np.array([])
+    registry = get_registry()
+    cache = get_cache()
+    keys = cache.row_keys(name, registry.version(name), method, X)
+    values = cache.get_many(keys)
+
+    missing = [i for i, value in enumerate(values) if value is None]
+    if missing:
+        predictor = registry.model(name) if len(missing) > LARGE_BATCH_ROWS else registry.predictor(name)
+        subset = X.iloc[missing] if hasattr(X, "iloc") else np.asarray(X)[missing]
+        computed = getattr(predictor, method)(subset)
+        cache.put_many([keys[i] for i in missing], list(computed))
+        for i, value in zip(missing, computed):
+            values[i] = value
+
+    return np.array(values)
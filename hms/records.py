@@ -0,0 +1,136 @@
+"""Medical records: paged per-patient history and ranked full-text search.
+
+``medical_records_fts`` is an external-content FTS5 index over the five
+free-text columns, kept in sync by triggers on ``medical_records``
+(migration 13). Only the index lives in the FTS table; snippets are
+built from the original rows.
+
+Run ``python -m hms.records --rebuild`` to rebuild and optimize the index,
+e.g. after records were edited with the triggers disabled.
+"""
+import argparse
+import re
+
+from hms import db
+from hms.patient_context import invalidate_patient
+
+VISIT_PAGE_SIZE = 20
+SEARCH_PAGE_SIZE = 20
+# bm25 column weights: a match in the diagnosis outranks one in the notes
+COLUMN_WEIGHTS = {"diagnosis": 10.0, "treatment": 5.0, "prescriptions": 3.0, "lab_results": 2.0, "notes": 1.0}
+HIGHLIGHT = ("**", "**")
+
+
+# -------- Visit history --------
+def list_visits(patient_id, before=None, limit=VISIT_PAGE_SIZE):
+    """One page of a patient's visits, newest first; returns (rows, next_cursor).
+
+    Rows are (record_id, visit_date, diagnosis), read straight from the
+    covering index. Pass the returned cursor as ``before`` to fetch the next
+    older page; it is None once the history is exhausted. Paging is keyset
+    on (visit_date, record_id), so deep pages cost the same as the first.
+    """
+    params = {"patient_id": patient_id, "limit": limit + 1}
+    older = ""
+    if before:
+        older = "AND (visit_date, record_id) < (:visit_date, :record_id)"
+        params["visit_date"], params["record_id"] = before
+    rows = db.query(f"""
+        SELECT record_id, visit_date, diagnosis FROM medical_records
+        WHERE patient_id = :patient_id {older}
+        ORDER BY visit_date DESC, record_id DESC
+        LIMIT :limit
+    """, params)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1]["visit_date"], rows[-1]["record_id"])
+
+
+def get_record_details(record_id):
+    """The free-text columns of one record, loaded when it is opened."""
+    return db.query_one(
+        "SELECT treatment, prescriptions, lab_results, notes FROM medical_records WHERE record_id = ?",
+        (record_id,),
+    )
+
+
+def save_medical_record(patient_id, visit_date, diagnosis, treatment, prescriptions, lab_results, notes):
+    db.execute(
+        """INSERT INTO medical_records (patient_id, visit_date, diagnosis, treatment, prescriptions, lab_results, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        (patient_id, visit_date, diagnosis, treatment, prescriptions, lab_results, notes)
+    )
+    invalidate_patient(patient_id)
+
+
+# -------- Full-text search --------
+def to_match_query(text):
+    """Turn free text into a safe FTS5 query.
+
+    Every word must match (implicit AND); "quoted words" match as a phrase
+    and a trailing * matches as a prefix. All other FTS5 syntax is quoted,
+    so user input can never raise a query syntax error.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        term = phrase or word
+        prefix = not phrase and term.endswith("*")
+        term = term.rstrip("*") if prefix else term
+        if term.strip():
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def search_records(text, patient_id=None, limit=SEARCH_PAGE_SIZE, offset=0):
+    """Rank records matching ``text`` by bm25; returns (DataFrame, total matches).
+
+    The frame has record_id, patient_id, visit_date, diagnosis, a
+    highlighted ``snippet`` from the best-matching column and ``score``
+    (lower is better). Pass ``patient_id`` to search one patient's history.
+    """
+    match = to_match_query(text)
+    if not match:
+        return db.read_frame("SELECT NULL AS record_id WHERE 0"), 0
+
+    where = "medical_records_fts MATCH :match" + (" AND m.patient_id = :patient_id" if patient_id else "")
+    params = {"match": match, "patient_id": patient_id, "limit": limit, "offset": offset,
+              "open": HIGHLIGHT[0], "close": HIGHLIGHT[1]}
+    total = db.query_one(f"""
+        SELECT COUNT(*) FROM medical_records_fts
+        JOIN medical_records m ON m.record_id = medical_records_fts.rowid
+        WHERE {where}
+    """, params)[0]
+    results = db.read_frame(f"""
+        SELECT m.record_id, m.patient_id, m.visit_date, m.diagnosis,
+               snippet(medical_records_fts, -1, :open, :close, ' … ', 16) AS snippet,
+               bm25(medical_records_fts, {', '.join(str(weight) for weight in COLUMN_WEIGHTS.values())}) AS score
+        FROM medical_records_fts
+        JOIN medical_records m ON m.record_id = medical_records_fts.rowid
+        WHERE {where}
+        ORDER BY score
+        LIMIT :limit OFFSET :offset
+    """, params)
+    return results, total
+
+
+def rebuild_search_index():
+    """Rebuild the FTS index from medical_records and merge its segments."""
+    with db.transaction(immediate=True) as conn:
+        conn.execute("INSERT INTO medical_records_fts (medical_records_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO medical_records_fts (medical_records_fts) VALUES ('optimize')")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search medical records or rebuild the search index.")
+    parser.add_argument("query", nargs="?", help="text to search for")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild and optimize the full-text index")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_search_index()
+        print("Search index rebuilt")
+    if args.query:
+        results, total = search_records(args.query)
+        print(f"{total} matching records")
+        print(results.to_string(index=False))
@@ -0,0 +1,75 @@
+"""Cohort-wide cardiovascular risk scoring.
+
+Scores every row of ``patients`` with one vectorized ``predict_proba``
+call on the CVRA model and upserts the probabilities into ``risk_scores``.
+The daily worklist (``top_n``) is then an indexed query, not a rescoring.
+
+Run with ``python -m hms.risk_batch``.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from hms import db
+from hms.features import RISK_SPEC
+from hms.model_registry import get_registry
+from hms.prediction_cache import cached_predict
+
+MODEL_NAME = "cvra"
+
+
+def positive_column(model):
+    """Column of ``predict_proba`` holding the high-risk probability.
+
+    Labels are sorted, so the positive class of a binary model is last
+    whether it was trained on 0/1, False/True or "no"/"yes".
+    """
+    classes = list(model.classes_)
+    if len(classes) != 2:
+        raise ValueError(f"Risk model '{MODEL_NAME}' must be a binary classifier; found classes {', '.join(map(str, classes))}")
+    return len(classes) - 1
+
+
+def score_cohort():
+    """Score all patients, upsert into risk_scores and return the scores."""
+    patients = db.read_frame(f"SELECT patient_id, {', '.join(RISK_SPEC.sources)} FROM patients")
+    entry = get_registry().get(MODEL_NAME)
+    columns = ["patient_id", "probability", "high_risk", "model_version", "scored_at"]
+    if patients.empty:
+        return pd.DataFrame(columns=columns)
+
+    positive = positive_column(entry.model)
+    probability = cached_predict(MODEL_NAME, RISK_SPEC.build(patients), "predict_proba")[:, positive]
+    scores = pd.DataFrame({
+        "patient_id": patients["patient_id"],
+        "probability": probability.astype(float),
+        "high_risk": (probability >= 0.5).astype(int),
+        "model_version": entry.version,
+        "scored_at": datetime.now().isoformat(sep=" ", timespec="seconds"),
+    })
+
+    db.executemany(f"""
+        INSERT INTO risk_scores ({', '.join(columns)}) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (patient_id) DO UPDATE SET
+            probability = excluded.probability,
+            high_risk = excluded.high_risk,
+            model_version = excluded.model_version,
+            scored_at = excluded.scored_at
+    """, scores[columns].itertuples(index=False, name=None))
+    return scores
+
+
+def top_n(n=50):
+    """The n highest-risk patients from the last scoring run."""
+    return db.read_frame("""
+        SELECT r.patient_id, p.name, p.age, r.probability, r.scored_at
+        FROM risk_scores r JOIN patients p ON p.patient_id = r.patient_id
+        ORDER BY r.probability DESC
+        LIMIT ?
+    """, (n,))
+
+
+if __name__ == "__main__":
+    scores = score_cohort()
+    print(f"Scored {len(scores)} patients, {int(scores['high_risk'].sum()) if len(scores) else 0} high risk")
+    print(top_n(20).to_string(index=False))
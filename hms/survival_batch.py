@@ -0,0 +1,87 @@
+"""Batch survival scoring with incremental rescoring.
+
+Builds the 13-column survival frame for every patient at once and hashes
+each row. Only patients whose input hash (or the model version) changed
+since their last score are sent to the model; everyone else keeps the
+stored result in ``survival_scores``.
+
+Run with ``python -m hms.survival_batch`` (``--full`` rescoring everyone).
+"""
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from hms import db
+from hms.features import SURVIVAL_SPEC
+from hms.model_registry import get_registry
+from hms.prediction_cache import cached_predict
+
+MODEL_NAME = "survival"
+
+
+def input_hashes(features):
+    """Stable per-row hash of the model inputs, as hex strings."""
+    return pd.util.hash_pandas_object(features, index=False).map("{:016x}".format).to_numpy()
+
+
+def score_changed(full=False):
+    """Rescore patients whose inputs or model changed; return (scored, skipped)."""
+    patients = db.read_frame(
+        f"SELECT patient_id, {', '.join(SURVIVAL_SPEC.sources)} FROM patients"
+    )
+    if patients.empty:
+        return 0, 0
+
+    entry = get_registry().get(MODEL_NAME)
+    features = SURVIVAL_SPEC.build(patients)
+    current = pd.DataFrame({"patient_id": patients["patient_id"], "input_hash": input_hashes(features)})
+
+    previous = db.read_frame("SELECT patient_id, input_hash AS previous_hash, model_version FROM survival_scores")
+    merged = current.merge(previous, on="patient_id", how="left")
+    stale = (merged["input_hash"] != merged["previous_hash"]) | (merged["model_version"] != entry.version)
+    if full:
+        stale[:] = True
+
+    stale = stale.to_numpy()
+    if stale.any():
+        prediction = cached_predict(MODEL_NAME, features[stale])
+        scored_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        rows = zip(
+            current["patient_id"].to_numpy()[stale],
+            current["input_hash"].to_numpy()[stale],
+            (np.asarray(prediction) == 1).astype(int).tolist(),
+        )
+        db.executemany("""
+            INSERT INTO survival_scores (patient_id, input_hash, high_survival, model_version, scored_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (patient_id) DO UPDATE SET
+                input_hash = excluded.input_hash,
+                high_survival = excluded.high_survival,
+                model_version = excluded.model_version,
+                scored_at = excluded.scored_at
+        """, [(pid, digest, survival, entry.version, scored_at) for pid, digest, survival in rows])
+
+    scored = int(stale.sum())
+    return scored, len(stale) - scored
+
+
+def low_survival_patients(limit=100):
+    """Most recently scored patients predicted to have low survival."""
+    return db.read_frame("""
+        SELECT s.patient_id, p.name, p.age, s.scored_at
+        FROM survival_scores s JOIN patients p ON p.patient_id = s.patient_id
+        WHERE s.high_survival = 0
+        ORDER BY s.scored_at DESC
+        LIMIT ?
+    """, (limit,))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score survival for all changed patients.")
+    parser.add_argument("--full", action="store_true", help="rescore every patient")
+    args = parser.parse_args()
+
+    scored, skipped = score_changed(full=args.full)
+    print(f"Rescored {scored} patients, {skipped} unchanged")
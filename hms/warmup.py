@@ -0,0 +1,114 @@
+"""Background model warm-up so no user request waits on a cold model.
+
+``start_warmup()`` is called from Main.py (and defensively from the
+prediction pages). Once per process it loads every registered model in a
+daemon thread and runs one dummy prediction through it. Pages call
+``require_models()`` to show a "warming up" notice instead of blocking;
+models that were missing or failed are retried there, so a model file
+deployed after start-up is picked up without a restart.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from hms.model_registry import get_registry
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+MISSING = "missing"
+ERROR = "error"
+
+
+def dummy_input(entry):
+    """A single all-zero row shaped like the model's training input."""
+    if entry.feature_names:
+        return pd.DataFrame(np.zeros((1, len(entry.feature_names))), columns=entry.feature_names)
+    return np.zeros((1, entry.model.n_features_in_))
+
+
+class Warmup:
+    """Loads and exercises every registered model in one background thread."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._status = {name: PENDING for name in registry.names()}
+        self._errors = {}
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="hms-model-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        for name in self.registry.names():
+            self._warm(name)
+        self._done.set()
+
+    def _warm(self, name):
+        self._status[name] = WARMING
+        try:
+            entry = self.registry.get(name)
+            sample = dummy_input(entry)
+            entry.model.predict(sample)
+            if hasattr(entry.model, "predict_proba"):
+                entry.model.predict_proba(sample)
+            # Also load the compiled NumPy ensemble when one is available
+            self.registry.predictor(name).predict(sample)
+            self._status[name] = READY
+            self._errors.pop(name, None)
+        except FileNotFoundError as exc:
+            self._status[name] = MISSING
+            self._errors[name] = str(exc)
+        except Exception as exc:
+            self._status[name] = ERROR
+            self._errors[name] = f"{type(exc).__name__}: {exc}"
+        return self._status[name]
+
+    def retry(self, name):
+        """Warm a missing or failed model again; return its new state."""
+        if self._status.get(name) in (MISSING, ERROR):
+            return self._warm(name)
+        return self._status.get(name, PENDING)
+
+    def status(self):
+        """Snapshot of {model name: state}."""
+        return dict(self._status)
+
+    def is_ready(self, name):
+        return self._status.get(name) == READY
+
+    def error(self, name):
+        return self._errors.get(name)
+
+    def wait(self, timeout=None):
+        """Block until warm-up finished (used by batch jobs, not pages)."""
+        return self._done.wait(timeout)
+
+
+@st.cache_resource
+def start_warmup():
+    """Start the process-wide warm-up thread once and return its tracker."""
+    return Warmup(get_registry()).start()
+
+
+def require_models(*names):
+    """Show a notice unless all named models are warm; return readiness."""
+    warmup = start_warmup()
+    # The file may have been deployed since the last attempt
+    states = {name: warmup.retry(name) for name in names}
+
+    failed = [name for name, state in states.items() if state in (MISSING, ERROR)]
+    if failed:
+        for name in failed:
+            st.error(f"❌ Model '{name}' is unavailable: {warmup.error(name)}")
+        return False
+    if any(state != READY for state in states.values()):
+        st.info("⏳ Prediction models are warming up. This takes a few seconds after server start, please retry shortly.")
+        return False
+    return True
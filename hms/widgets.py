@@ -0,0 +1,48 @@
+"""Streamlit widgets shared by the pages."""
+import streamlit as st
+
+from hms.patient_context import get_patient_context
+from hms.patients import search_patients
+
+
+def patient_picker(label="🔍 Find Patient by Name or ID", key="patient", default=""):
+    """Typeahead patient lookup; returns the chosen patient_id or None.
+
+    Type the start of a name or ID and press Enter; the matches fill a
+    select box whose value is kept in ``st.session_state[key]``, with a
+    summary of the chosen patient underneath. ``default``
+    seeds the search text, e.g. with an ID chosen earlier on the page.
+    """
+    query_key = f"{key}_query"
+    if default and query_key not in st.session_state:
+        st.session_state[query_key] = default
+    query = st.text_input(label, key=query_key, placeholder="e.g. Krish or 288d")
+    if not query.strip():
+        return None
+
+    matches = {row["patient_id"]: row for row in search_patients(query)}
+    if not matches:
+        st.caption("No patients match that name or ID.")
+        return None
+
+    def describe(patient_id):
+        row = matches[patient_id]
+        return f"{(row['name'] or '').strip() or 'Unnamed'} · {patient_id} · {row['age']} {row['gender'] or ''}".strip()
+
+    patient_id = st.selectbox("Patient", list(matches), format_func=describe, key=key)
+    patient_summary(patient_id)
+    return patient_id
+
+
+def patient_summary(patient_id):
+    """One-line caption of the patient's bed, bill and last visit from the cached context."""
+    context = get_patient_context(patient_id)
+    if context is None:
+        return
+    parts = [f"🛏️ {context['ward_type']} bed {context['bed_assigned']}" if context["ward_type"] else "🛏️ No bed"]
+    if context["grand_total"] is not None:
+        parts.append(f"💰 ₹{context['grand_total']:,.0f} billed")
+    if context["recent_records"]:
+        last = context["recent_records"][0]
+        parts.append(f"📋 Last visit {last['visit_date']}: {last['diagnosis']}")
+    st.caption(" · ".join(parts))
@@ -1,5 +1,6 @@
 import streamlit as st
-import sqlite3
+from hms import db
+from hms.patient_context import invalidate_patient
 import uuid  # To generate unique Patient IDs
 
 # Ensure user is logged in
@@ -11,33 +12,6 @@ st.set_page_config(page_title="Add New Patient", layout="wide")
 
 st.title("➕ Add New Patient")
 
-# Database Connection
-conn = sqlite3.connect("database/hms_database.db")
-c = conn.cursor()
-
-# Create Patients Table if Not Exists
-c.execute("""
-    CREATE TABLE IF NOT EXISTS patients (
-        patient_id TEXT PRIMARY KEY,
-        name TEXT,
-        age INTEGER,
-        gender TEXT,
-        smoking TEXT,
-        diabetes TEXT,
-        hypertension TEXT,
-        CAD TEXT,
-        admission_type TEXT,
-        HB REAL,
-        TLC REAL,
-        glucose REAL,
-        urea REAL,
-        creatinine REAL,
-        BNP REAL,
-        EF REAL
-    )
-""")
-conn.commit()
-
 # Generate a unique Patient ID
 patient_id = str(uuid.uuid4())[:8]  # Shorter version of UUID
 
@@ -72,17 +46,15 @@ with st.form("add_patient_form", clear_on_submit=True):
 # Insert Data into Database
 if submit_button:
     if name:
-        c.execute("""
+        db.execute("""
             INSERT INTO patients (patient_id, name, age, gender, smoking, diabetes, hypertension, CAD, admission_type, HB, TLC, glucose, urea, creatinine, BNP, EF)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (patient_id, name, age, gender, smoking, diabetes, hypertension, CAD, admission_type, HB, TLC, glucose, urea, creatinine, BNP, EF))
-        conn.commit()
+        invalidate_patient(patient_id)
         st.success(f"✅ Patient {name} added successfully! 📄 Patient ID: **{patient_id}**")
     else:
         st.error("⚠️ Please enter a valid name!")
 
-conn.close()
-
 # Back Button
 st.divider()
 if st.button("🔙 Back to Dashboard"):
@@ -1,6 +1,11 @@
 import streamlit as st
-import sqlite3
-from datetime import datetime
+from hms.bed_forecast import forecast, SIMULATIONS
+from hms.beds import (
+    fetch_bed_status, assign_bed, revoke_bed, bed_state_version, list_occupants,
+    parse_bed_moves, apply_bed_moves, DISCHARGE,
+)
+from hms.warmup import require_models
+from hms.widgets import patient_picker
 
 # Initialize session state
 if "allow_los" not in st.session_state:
@@ -8,150 +13,110 @@ if "allow_los" not in st.session_state:
 if "ward_type" not in st.session_state:
     st.session_state["ward_type"] = ""
 
-# Initialize Database
-def init_db():
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    
-    # Table to store bed availability
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS hospital_beds (
-            ward_type TEXT PRIMARY KEY,
-            total_beds INTEGER,
-            occupied_beds INTEGER,
-            available_beds INTEGER
-        )
-    """)
-    
-    # Table to track patient bed assignments
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS patient_beds (
-            patient_id TEXT PRIMARY KEY,
-            ward_type TEXT,
-            bed_assigned INTEGER,
-            assigned_at TIMESTAMP
-        )
-    """)
-    
-    # Initialize bed data (if not exists)
-    c.execute("SELECT COUNT(*) FROM hospital_beds")
-    if c.fetchone()[0] == 0:
-        c.executemany("""
-            INSERT INTO hospital_beds (ward_type, total_beds, occupied_beds, available_beds) 
-            VALUES (?, ?, ?, ?)
-        """, [
-            ("ICU", 50, 46, 4),
-            ("Ward", 100, 85, 15)
-        ])
-    
-    conn.commit()
-    conn.close()
-
-init_db()
-
-# Fetch Current Bed Status
-def fetch_bed_status():
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM hospital_beds")
-    data = {row[0]: {"Total Beds": row[1], "Occupied Beds": row[2], "Available Beds": row[3]} for row in c.fetchall()}
-    conn.close()
-    return data
-
-# Assign a Bed to a Patient
-def assign_bed(patient_id, ward_type):
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-
-    # Check if patient already has a bed
-    c.execute("SELECT * FROM patient_beds WHERE patient_id = ?", (patient_id,))
-    existing_patient = c.fetchone()
-
-    if existing_patient:
-        conn.close()
-        return False, "❌ Patient already has a bed assigned!"
-
-    # Check bed availability
-    c.execute("SELECT available_beds FROM hospital_beds WHERE ward_type = ?", (ward_type,))
-    available_beds = c.fetchone()[0]
-
-    if available_beds > 0:
-        # Assign bed
-        c.execute("INSERT INTO patient_beds (patient_id, ward_type, bed_assigned, assigned_at) VALUES (?, ?, ?, ?)",
-                  (patient_id, ward_type, 1, datetime.now()))
-
-        # Update bed count
-        c.execute("""
-            UPDATE hospital_beds 
-            SET occupied_beds = occupied_beds + 1, available_beds = available_beds - 1 
-            WHERE ward_type = ?
-        """, (ward_type,))
-        
-        conn.commit()
-        conn.close()
-        return True, f"✅ Bed assigned to patient {patient_id} in {ward_type}."
-    else:
-        conn.close()
-        return False, f"❌ No available beds in {ward_type}."
-
-# Revoke a Bed Assignment
-def revoke_bed(patient_id):
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-
-    # Check if patient has a bed assigned
-    c.execute("SELECT ward_type FROM patient_beds WHERE patient_id = ?", (patient_id,))
-    result = c.fetchone()
-
-    if not result:
-        conn.close()
-        return False, "❌ No bed found for this patient."
-
-    ward_type = result[0]
-
-    # Remove bed assignment
-    c.execute("DELETE FROM patient_beds WHERE patient_id = ?", (patient_id,))
-
-    # Update bed count
-    c.execute("""
-        UPDATE hospital_beds 
-        SET occupied_beds = occupied_beds - 1, available_beds = available_beds + 1 
-        WHERE ward_type = ?
-    """, (ward_type,))
-
-    conn.commit()
-    conn.close()
-    return True, f"✅ Bed revoked for patient {patient_id}."
+BOARD_REFRESH_SECONDS = 5
 
 # Streamlit UI
 st.title("🏥 Hospital Bed Management")
 
-# Display Bed Availability
-st.write("### Current Bed Status")
-hospital_data = fetch_bed_status()
-st.json(hospital_data)
+# -------- Bed Actions (callbacks run before the page redraws) --------
+def run_bed_action(action):
+    patient_id = st.session_state.get("bed_patient_id")
+    if not patient_id:
+        st.session_state["bed_message"] = (False, "⚠ Please select a patient.")
+    elif action == "assign":
+        st.session_state["bed_message"] = assign_bed(patient_id, st.session_state["bed_ward_type"])
+    else:
+        st.session_state["bed_message"] = revoke_bed(patient_id)
+
+def run_bulk_moves():
+    moves, errors = parse_bed_moves(st.session_state["bulk_moves"])
+    moves += [(DISCHARGE, patient_id, None) for patient_id in st.session_state["bulk_discharges"]]
+    if not errors and not moves:
+        errors = ["⚠ Enter at least one move."]
+    ok, messages = (False, errors) if errors else apply_bed_moves(moves)
+    st.session_state["bulk_result"] = (ok, messages)
+    if ok:
+        st.session_state["bulk_moves"] = ""
+        st.session_state["bulk_discharges"] = []
+
+# -------- Live Bed Board --------
+# Each tick reads only the change counter; the ward counts are re-queried
+# when it moved, so idle boards cost one tiny SELECT per refresh.
+@st.fragment(run_every=BOARD_REFRESH_SECONDS)
+def bed_board():
+    version = bed_state_version()
+    if st.session_state.get("bed_board_version") != version:
+        st.session_state["bed_board_version"] = version
+        st.session_state["bed_board"] = fetch_bed_status()
+
+    st.write("### Current Bed Status")
+    for column, (ward, counts) in zip(st.columns(len(st.session_state["bed_board"]) or 1),
+                                      st.session_state["bed_board"].items()):
+        with column:
+            st.metric(f"🛏️ {ward} Available", counts["Available Beds"], help=f"{counts['Total Beds']} beds in total")
+            occupancy = counts["Occupied Beds"] / counts["Total Beds"] if counts["Total Beds"] else 0
+            st.progress(min(occupancy, 1.0), text=f"{counts['Occupied Beds']} / {counts['Total Beds']} occupied")
+
+bed_board()
 
 # User Inputs
-patient_id = st.text_input("Enter Patient ID:")
-ward_type = st.selectbox("Select Ward Type:", ["ICU", "Ward"])
+patient_picker(key="bed_patient_id")
+st.selectbox("Select Ward Type:", ["ICU", "Ward"], key="bed_ward_type")
 
-# Assign Bed Button
-if st.button("Assign Bed"):
-    if not patient_id.strip():
-        st.warning("⚠ Please enter a valid Patient ID.")
-    else:
-        success, message = assign_bed(patient_id.strip(), ward_type)
-        st.write(message)
-        st.rerun()
+col1, col2 = st.columns(2)
+with col1:
+    st.button("Assign Bed", on_click=run_bed_action, args=("assign",))
+with col2:
+    st.button("Revoke Bed", on_click=run_bed_action, args=("revoke",))
+
+if "bed_message" in st.session_state:
+    success, message = st.session_state.pop("bed_message")
+    (st.success if success else st.error)(message)
 
-# Revoke Bed Button
-if st.button("Revoke Bed"):
-    if not patient_id.strip():
-        st.warning("⚠ Please enter a valid Patient ID.")
+# Bulk Operations (all moves applied in one transaction, or none)
+st.divider()
+st.write("### 📋 Bulk Bed Operations")
+occupants = {row["patient_id"]: f"{row['patient_id']} ({row['ward_type']}, bed {row['bed_assigned']})" for row in list_occupants()}
+st.multiselect("Discharge patients", list(occupants), format_func=occupants.get, key="bulk_discharges")
+st.text_area(
+    "Moves (one per line)", key="bulk_moves", height=150,
+    placeholder="assign P1001 ICU\ntransfer P1002 Ward\ndischarge P1003",
+)
+st.button("✅ Validate & Apply All", on_click=run_bulk_moves)
+
+if "bulk_result" in st.session_state:
+    ok, messages = st.session_state.pop("bulk_result")
+    if ok:
+        st.success(f"Applied {len(messages)} moves.")
     else:
-        success, message = revoke_bed(patient_id.strip())
+        st.error("Nothing was applied. Fix these and try again:")
+    for message in messages:
         st.write(message)
-        st.rerun()
+
+# Occupancy Forecast (current occupants' predicted stays)
+st.divider()
+st.write("### 📅 Bed Forecast")
+models_ready = require_models("los_icu", "los_ward")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    forecast_days = st.slider("Days ahead", min_value=1, max_value=30, value=7)
+with col2:
+    icu_admissions = st.number_input("Expected ICU admissions / day", min_value=0.0, value=0.0, step=0.5)
+with col3:
+    ward_admissions = st.number_input("Expected Ward admissions / day", min_value=0.0, value=0.0, step=0.5)
+show_bands = st.checkbox("Show uncertainty band (Monte Carlo over the model's trees)")
+
+if st.button("📈 Forecast Free Beds", disabled=not models_ready):
+    projection = forecast(
+        forecast_days, {"ICU": icu_admissions, "Ward": ward_admissions},
+        simulations=SIMULATIONS if show_bands else 0,
+    )
+    st.line_chart(projection.pivot(index="day", columns="ward_type", values="projected_free"))
+    full = projection[projection["projected_free"] <= 0]
+    for ward_type, first in full.groupby("ward_type")["day"].min().items():
+        st.error(f"🚨 {ward_type} projected to be full on {first:%d %b}. Consider diverting elective admissions.")
+    st.dataframe(projection, use_container_width=True, hide_index=True)
 
 # Back Button
 st.divider()
@@ -1,73 +1,32 @@
-import sqlite3
-import pickle
-import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import streamlit as st
+from hms.features import BILL_SPEC
+from hms.billing import record_bill, what_if_costs, DISEASE_CHARGES, STAY_CHARGE_PER_DAY
+from hms.model_registry import get_registry
+from hms.patient_context import get_patient_context
+from hms.prediction_cache import cached_predict
+from hms.warmup import require_models
+from hms.widgets import patient_picker
 
 # -------- Initialize Session State --------
 if "page" not in st.session_state:
     st.session_state["page"] = "pharmacy"
 if "pharmacy_total" not in st.session_state:
     st.session_state["pharmacy_total"] = 0
+if "pharmacy_items" not in st.session_state:
+    st.session_state["pharmacy_items"] = {}
 if "patient_id" not in st.session_state:
     st.session_state["patient_id"] = ""
 
-# -------- Database Setup --------
-def init_db():
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS billing (
-            patient_id TEXT PRIMARY KEY,
-            pharmacy_total REAL DEFAULT 0,
-            hospital_total REAL DEFAULT 0,
-            grand_total REAL DEFAULT 0
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-def fetch_patient_details(patient_id):
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("SELECT age, gender, admission_type FROM patients WHERE patient_id = ?", (patient_id,))
-    patient_details = c.fetchone()
-    conn.close()
-    return patient_details if patient_details else (None, None, None)
-
-init_db()
-
-def update_bill(patient_id, pharmacy_total, hospital_total, grand_total):
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM billing WHERE patient_id = ?", (patient_id,))
-    existing_record = c.fetchone()
-    
-    if existing_record:
-        c.execute("""
-            UPDATE billing
-            SET pharmacy_total = ?, hospital_total = ?, grand_total = ?
-            WHERE patient_id = ?
-        """, (pharmacy_total, hospital_total, grand_total, patient_id))
-    else:
-        c.execute("""
-            INSERT INTO billing (patient_id, pharmacy_total, hospital_total, grand_total)
-            VALUES (?, ?, ?, ?)
-        """, (patient_id, pharmacy_total, hospital_total, grand_total))
-    
-    conn.commit()
-    conn.close()
-
 # -------- PHARMACY BILL PAGE --------
 def pharmacy_bill():
     st.title("🛒 Pharmacy Billing System")
     
-    patient_id = st.text_input("Enter Patient ID:", value=st.session_state["patient_id"])
-    st.session_state["patient_id"] = patient_id.strip()
+    patient_id = patient_picker(key="billing_patient", default=st.session_state["patient_id"])
+    st.session_state["patient_id"] = patient_id or ""
     
     if not patient_id:
-        st.warning("⚠ Please enter a valid Patient ID to proceed.")
+        st.warning("⚠ Please select a patient to proceed.")
         return
     
     medicines = st.number_input("💊 Medicines Cost (₹)", min_value=0, value=500)
@@ -76,10 +35,15 @@ def pharmacy_bill():
     consultation_fee = st.number_input("🩺 Consultation Fee (₹)", min_value=0, value=700)
     lab_tests = st.number_input("🧪 Lab Tests Cost (₹)", min_value=0, value=1500)
     
-    pharmacy_total = medicines + injections + surgical_items + consultation_fee + lab_tests
+    pharmacy_items = {
+        "Medicines": medicines, "Injections": injections, "Surgical Items": surgical_items,
+        "Consultation Fee": consultation_fee, "Lab Tests": lab_tests
+    }
+    pharmacy_total = sum(pharmacy_items.values())
     
     if st.button("Proceed to Hospital Bill"):
         st.session_state["pharmacy_total"] = pharmacy_total
+        st.session_state["pharmacy_items"] = pharmacy_items
         st.session_state["page"] = "hospital"
         st.rerun()
 
@@ -90,51 +54,38 @@ def hospital_bill():
     patient_id = st.session_state["patient_id"]
     st.subheader(f"Patient ID: {patient_id}")
     
-    age, gender, admission_type = fetch_patient_details(patient_id)
-    if age is None:
+    patient = get_patient_context(patient_id)
+    if patient is None:
         st.error("Patient details not found! Please enter a valid Patient ID.")
         return
+    age, gender, admission_type = patient["age"], patient["gender"], patient["admission_type"]
     
     st.write(f"👤 Age: {age}")
     st.write(f"⚧ Gender: {gender}")
     st.write(f"🏥 Admission Type: {admission_type}")
     
-    with open("models/hospital_bill.pkl", "rb") as file:
-        model = pickle.load(file)
-    with open("models/feature_names.pkl", "rb") as f:
-        feature_names = pickle.load(f)
+    model_ready = require_models("hospital_bill")
     
     los = st.number_input("Length of Stay (Days)", min_value=1, max_value=30, value=5)
     
-    diseases = {
-        "STEMI": 10000, "ACS": 8000, "Heart Failure": 12000, "CVA Infarct": 7000,
-        "DVT": 5000, "Shock": 15000, "Pulmonary Embolism": 9000, "AKI": 11000,
-        "VT": 6000, "CHB": 7500, "Severe Chest Infection": 6500,
-        "Cardiogenic Shock": 13000, "CVA Bleed": 9500, "Infective Endocarditis": 10000
-    }
+    diseases = DISEASE_CHARGES
     disease_inputs = {disease: st.checkbox(disease, value=False) for disease in diseases.keys()}
     
-    gender_encoded = 0 if gender == "Male" else 1
-    admission_encoded = 0 if admission_type == "General Ward" else 1
-    disease_values = [1 if disease_inputs[d] else 0 for d in diseases.keys()]
-    
     selected_diseases = {d: cost for d, cost in diseases.items() if disease_inputs[d]}
     disease_cost = sum(selected_diseases.values())
     
-    input_dict = {"Age": age, "Gender_Female": gender_encoded, "Admission_Type_ICU": admission_encoded, "Length_of_Stay": los}
-    for disease in diseases.keys():
-        input_dict[disease] = 1 if disease_inputs[disease] else 0
+    bill_inputs = {"age": age, "gender": gender, "admission_type": admission_type, "los": los, **disease_inputs}
     
-    input_df = pd.DataFrame([input_dict]).reindex(columns=feature_names, fill_value=0)
-    
-    if st.button("Estimate Total Bill"):
-        base_bill = model.predict(input_df)[0]
-        stay_charge = los * 500
+    if st.button("Estimate Total Bill", disabled=not model_ready):
+        feature_names = get_registry().get("hospital_bill").feature_names
+        base_bill = cached_predict("hospital_bill", BILL_SPEC.build(bill_inputs, columns=feature_names))[0]
+        stay_charge = los * STAY_CHARGE_PER_DAY
         admission_charge = 5000 if admission_type == "ICU" else 2000
-        hospital_total = base_bill + stay_charge + admission_charge + disease_cost
-        grand_total = hospital_total + st.session_state["pharmacy_total"]
+        hospital_items = {"Base Charge": base_bill, "Stay Charge": stay_charge, "Admission Charge": admission_charge}
         
-        update_bill(patient_id, st.session_state["pharmacy_total"], hospital_total, grand_total)
+        _, hospital_total, grand_total = record_bill(
+            patient_id, st.session_state["pharmacy_items"], hospital_items, selected_diseases
+        )
         
         st.subheader("📌 Detailed Bill Breakdown")
         st.write(f"🏥 Base Charge: ₹{base_bill:,.2f}")
@@ -174,6 +125,25 @@ def hospital_bill():
             ax.set_title("Disease Contribution to Total Hospital Bill")
             st.pyplot(fig)
 
+    # -------- What-if Cost Curve --------
+    st.divider()
+    st.subheader("📈 What-if Cost Curve")
+    wards = st.multiselect("Compare wards", ["General Ward", "ICU"], default=["General Ward", "ICU"])
+    if st.toggle("Show costs for every length of stay", disabled=not model_ready or not wards):
+        feature_names = get_registry().get("hospital_bill").feature_names
+        curve, sensitivity = what_if_costs(age, gender, selected_diseases, feature_names, los, wards)
+        curve["Grand Total"] = curve["Hospital Total"] + st.session_state["pharmacy_total"]
+
+        st.line_chart(curve.pivot(index="Length of Stay", columns="Ward", values="Grand Total"))
+        st.caption("Grand total including the pharmacy bill, for the currently selected diseases.")
+        st.dataframe(
+            curve.pivot(index="Length of Stay", columns="Ward", values=["Grand Total", "Cost of Extra Day"]).round(2),
+            use_container_width=True,
+        )
+
+        st.write(f"🦠 Cost impact of adding (or removing) each disease at {los} days:")
+        st.dataframe(sensitivity.round(2), use_container_width=True)
+
 if st.session_state["page"] == "pharmacy":
     pharmacy_bill()
 else:
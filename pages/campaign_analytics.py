@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+import pandas as pd
+import streamlit as st
+from hms.campaigns import daily_summary, disease_summary, rollup_states
+
+# Charts are drawn from the daily rollup tables, not from individual campaigns
+st.title("📈 Health Campaign Analytics")
+
+col1, col2 = st.columns(2)
+with col1:
+    dates = st.date_input("📅 Date Range", value=(date.today() - timedelta(days=30), date.today()))
+with col2:
+    state = st.selectbox("🗺️ State", ["All States"] + rollup_states())
+
+start, end = (dates + (None, None))[:2] if isinstance(dates, tuple) else (dates, None)
+if start is None:
+    st.info("📅 Pick a start date to see campaign analytics.")
+    st.stop()
+# A half-picked range covers just its start day
+end = (end or start) + timedelta(days=1)
+state = None if state == "All States" else state
+
+daily = daily_summary(start, end, state)
+diseases = disease_summary(start, end, state)
+# Names match case-insensitively in the database; show one spelling per place
+for frame in (daily, diseases):
+    for column in ("state", "city"):
+        frame[column] = frame[column].str.title()
+
+if daily.empty:
+    st.info("No campaigns recorded for this period.")
+else:
+    def mean_aqi(frame):
+        count = frame["aqi_count"].sum()
+        return frame["aqi_sum"].sum() / count if count else float("nan")
+
+    # -------- Headline Numbers --------
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Campaigns", int(daily["campaigns"].sum()))
+    col2.metric("High Risk Areas", int(daily.loc[daily["risk_category"] == "High Risk", "campaigns"].sum()))
+    col3.metric("Mean Predicted AQI", f"{mean_aqi(daily):.1f}")
+
+    # -------- Trend --------
+    st.subheader("🗓️ Campaigns per Day by Risk Category")
+    trend = daily.pivot_table(index="day", columns="risk_category", values="campaigns", aggfunc="sum", fill_value=0)
+    trend.index = pd.to_datetime(trend.index)
+    st.bar_chart(trend)
+
+    # -------- Regions --------
+    region = "city" if state else "state"
+    st.subheader(f"🏙️ By {region.title()}")
+    by_region = daily.groupby(region).agg(campaigns=("campaigns", "sum"), aqi_sum=("aqi_sum", "sum"), aqi_count=("aqi_count", "sum"))
+    by_region["mean_aqi"] = by_region["aqi_sum"] / by_region["aqi_count"].where(by_region["aqi_count"] > 0)
+    by_region["high_risk"] = daily[daily["risk_category"] == "High Risk"].groupby(region)["campaigns"].sum()
+    by_region = by_region.fillna({"high_risk": 0}).sort_values("campaigns", ascending=False)
+    st.bar_chart(by_region["campaigns"])
+    st.dataframe(by_region[["campaigns", "high_risk", "mean_aqi"]].round(1), use_container_width=True)
+
+    # -------- Diseases --------
+    st.subheader("🦠 Suggested Diseases")
+    if diseases.empty:
+        st.write("No diseases were suggested in this period.")
+    else:
+        by_disease = diseases.groupby("disease")["campaigns"].sum().sort_values(ascending=False)
+        st.bar_chart(by_disease)
+        disease_trend = diseases.pivot_table(index="day", columns="disease", values="campaigns", aggfunc="sum", fill_value=0)
+        disease_trend.index = pd.to_datetime(disease_trend.index)
+        st.line_chart(disease_trend)
+
+# Back Button
+st.divider()
+if st.button("🔙 Back to Dashboard"):
+    st.switch_page("pages/staff_dashboard.py")
@@ -1,5 +1,5 @@
 import streamlit as st
-import sqlite3
+from hms import db
 
 # Initialize session state variables
 if "logged_in" not in st.session_state:
@@ -11,11 +11,7 @@ if "role" not in st.session_state:
 
 def check_login(username, password):
     """Check login credentials from SQLite database"""
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("SELECT role FROM users WHERE username=? AND password=?", (username, password))
-    result = c.fetchone()
-    conn.close()
+    result = db.query_one("SELECT role FROM users WHERE username=? AND password=?", (username, password))
     return result[0] if result else None  # Return role (Doctor or Staff)
 
 def show_login():
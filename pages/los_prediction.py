@@ -1,39 +1,14 @@
 import streamlit as st
-import sqlite3
-import pickle
-import numpy as np
-
-# Load ICU and Ward LOS models
-@st.cache_resource
-def load_model(file_path):
-    with open(file_path, "rb") as file:
-        return pickle.load(file)
-
-icu_model = load_model(r"C:\Users\KRISH\.spyder-py3\HMS\models\random_forest_icu.pkl")  # ICU Model
-ward_model = load_model(r"C:\Users\KRISH\.spyder-py3\HMS\models\xgboost_ward.pkl")  # Ward Model
+from hms import db
+from hms.features import LOS_SPEC, is_yes
+from hms.patient_context import get_patient_context, invalidate_patient
+from hms.prediction_cache import cached_predict
+from hms.warmup import require_models
+from hms.widgets import patient_picker
 
 # Database Connection
-def get_patient_data(patient_id):
-    conn = sqlite3.connect("database/hms_database.db")  
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM patients WHERE patient_id=?", (patient_id,))
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row:
-        return {
-            "name": row[1], "age": row[2], "gender": row[3], "smoking": row[4], 
-            "diabetes": row[5], "hypertension": row[6], "CAD": row[7], "admission_type": row[8],
-            "HB": row[9], "TLC": row[10], "glucose": row[11], "urea": row[12], "creatinine": row[13], 
-            "BNP": row[14], "EF": row[15]
-        }
-    return None
-
 def save_patient_data(patient_id, additional_data):
-    conn = sqlite3.connect("database/hms_database.db")  
-    cursor = conn.cursor()
-    
-    cursor.execute(
+    db.execute(
         """UPDATE patients SET platelets=?, acs=?, hfref=?, stemi=?, chb=?, af=?, vt=?, uti=?, 
         cardiogenic_shock=?, shock=?, pulmonary_embolism=?, rural=? WHERE patient_id=?""",
         (
@@ -44,22 +19,25 @@ def save_patient_data(patient_id, additional_data):
             patient_id
         )
     )
-    conn.commit()
-    conn.close()
+    invalidate_patient(patient_id)
 
 # Select ICU or Ward
 st.title("🏥 Length of Stay (LOS) Prediction")
 
 ward_type = st.selectbox("🏥 Select Patient Type:", ["ICU", "Ward"])
-selected_model = icu_model if ward_type == "ICU" else ward_model
+model_name = "los_icu" if ward_type == "ICU" else "los_ward"  # ICU: Random Forest, Ward: XGBoost
+model_ready = require_models(model_name)
+
+# Patient Lookup (typeahead by name or ID)
+patient_id = patient_picker(key="los_patient")
 
-# Patient ID Input
-patient_id = st.text_input("🔍 Enter Patient ID to Fetch Details")
-patient_data = None
+# Fetch Details Button (the fetched patient stays loaded across reruns)
+fetch_clicked = st.button("Fetch Details")
+if fetch_clicked:
+    st.session_state["los_patient_fetched"] = patient_id
+patient_data = get_patient_context(st.session_state.get("los_patient_fetched"))
 
-# Fetch Details Button
-if st.button("Fetch Details"):
-    patient_data = get_patient_data(patient_id)
+if fetch_clicked:
     if patient_data:
         st.success(f"✅ Data Found for **{patient_data['name']}**")
     else:
@@ -83,11 +61,9 @@ with col2:
 with col3:
     ef = st.number_input("EF", min_value=0.0, max_value=100.0, value=patient_data["EF"] if patient_data else 50.0)
     bnp = st.number_input("BNP", min_value=0.0, max_value=5000.0, value=patient_data["BNP"] if patient_data else 500.0)
-    admission_type = st.radio("Type of Admission", ["Emergency", "OPD"], index=0 if patient_data and patient_data["admission_type"] == 1 else 1)
+    admission_type = st.radio("Type of Admission", ["Emergency", "OPD"], index=0 if patient_data and str(patient_data["admission_type"]).upper() == "EMERGENCY" else 1)
 
-admission_type = 1 if admission_type == "Emergency" else 0
-cad = st.radio("Coronary Artery Disease (CAD)?", ["Yes", "No"], index=0 if patient_data and patient_data["CAD"] == 1 else 1)
-cad = 1 if cad == "Yes" else 0
+cad = st.radio("Coronary Artery Disease (CAD)?", ["Yes", "No"], index=0 if patient_data and is_yes(patient_data["CAD"]) else 1)
 
 # Additional Details
 st.header("📌 Additional Patient Details")
@@ -113,29 +89,18 @@ cardiogenic_shock = st.radio("Cardiogenic Shock?", ["Yes", "No"])
 shock = st.radio("Shock?", ["Yes", "No"])
 pulmonary_embolism = st.radio("Pulmonary Embolism?", ["Yes", "No"])
 
-# Convert categorical inputs to numerical
-rural = 1 if rural == "Yes" else 0
-acs = 1 if acs == "Yes" else 0
-hfref = 1 if hfref == "Yes" else 0
-stemi = 1 if stemi == "Yes" else 0
-chb = 1 if chb == "Yes" else 0
-af = 1 if af == "Yes" else 0
-vt = 1 if vt == "Yes" else 0
-uti = 1 if uti == "Yes" else 0
-cardiogenic_shock = 1 if cardiogenic_shock == "Yes" else 0
-shock = 1 if shock == "Yes" else 0
-pulmonary_embolism = 1 if pulmonary_embolism == "Yes" else 0
-
-# Convert input to NumPy array
-input_features = np.array([
-    hb, tlc, platelets, glucose, urea, creatinine, ef, bnp,
-    age, rural, admission_type, cad, acs, hfref, stemi, chb, af, vt, uti, 
-    cardiogenic_shock, shock, pulmonary_embolism
-]).reshape(1, -1)
+# Encode the form in the column order the LOS models were trained on
+input_features = LOS_SPEC.build({
+    "HB": hb, "TLC": tlc, "platelets": platelets, "glucose": glucose, "urea": urea,
+    "creatinine": creatinine, "EF": ef, "BNP": bnp, "age": age, "rural": rural,
+    "admission_type": admission_type, "CAD": cad, "acs": acs, "hfref": hfref, "stemi": stemi,
+    "chb": chb, "af": af, "vt": vt, "uti": uti, "cardiogenic_shock": cardiogenic_shock,
+    "shock": shock, "pulmonary_embolism": pulmonary_embolism,
+})
 
 # Predict button
-if st.button("Predict LOS"):
-    prediction = selected_model.predict(input_features)[0]
+if st.button("Predict LOS", disabled=not model_ready):
+    prediction = cached_predict(model_name, input_features)[0]
     st.success(f"🛏️ Predicted Length of Stay: {prediction:.2f} days")
 
 # Back Button
@@ -1,47 +1,99 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-
-# Database Connection
-def get_patient_medical_records(patient_id):
-    conn = sqlite3.connect("database/hms_database.db")  
-    query = """SELECT visit_date, diagnosis, treatment, prescriptions, lab_results, notes 
-               FROM medical_records WHERE patient_id=? ORDER BY visit_date DESC"""
-    records = pd.read_sql_query(query, conn, params=(patient_id,))
-    conn.close()
-    return records
-
-# Function to Save New Record
-def save_medical_record(patient_id, visit_date, diagnosis, treatment, prescriptions, lab_results, notes):
-    conn = sqlite3.connect("database/hms_database.db")  
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """INSERT INTO medical_records (patient_id, visit_date, diagnosis, treatment, prescriptions, lab_results, notes) 
-        VALUES (?, ?, ?, ?, ?, ?, ?)""",
-        (patient_id, visit_date, diagnosis, treatment, prescriptions, lab_results, notes)
-    )
-    
-    conn.commit()
-    conn.close()
+from hms.widgets import patient_picker
+from hms.records import list_visits, get_record_details, save_medical_record, search_records, SEARCH_PAGE_SIZE
 
 # Page UI
 st.title("📋 Patient Medical Records")
 
-# Patient ID Input
-patient_id = st.text_input("🔍 Enter Patient ID to Fetch Records")
+# Patient Lookup (typeahead by name or ID)
+patient_id = patient_picker(key="records_patient_id")
+
+# Visits loaded for a different patient than the one now picked are stale
+if st.session_state.get("records_patient") not in (None, patient_id):
+    for state_key in ("records_patient", "records_visits", "records_details", "records_cursor"):
+        st.session_state.pop(state_key, None)
+
+# -------- Visit History (latest visits first, older pages and full text on demand) --------
+def load_visits(older=False):
+    if not older:
+        st.session_state["records_patient"] = patient_id
+        st.session_state["records_visits"] = []
+        st.session_state["records_details"] = {}
+    rows, cursor = list_visits(
+        st.session_state["records_patient"],
+        before=st.session_state.get("records_cursor") if older else None,
+    )
+    st.session_state["records_visits"] += [tuple(row) for row in rows]
+    st.session_state["records_cursor"] = cursor
+
+def load_details(record_id):
+    st.session_state["records_details"][record_id] = get_record_details(record_id)
 
-# Fetch Button
 if st.button("Fetch Medical Records"):
     if patient_id:
-        records = get_patient_medical_records(patient_id)
-        if not records.empty:
-            st.success(f"✅ Medical records found for **Patient ID: {patient_id}**")
-            st.dataframe(records)
-        else:
-            st.warning("⚠️ No medical records found for this patient.")
+        load_visits()
+    else:
+        st.error("❌ Please select a patient.")
+
+if st.session_state.get("records_patient"):
+    visits = st.session_state["records_visits"]
+    if visits:
+        st.success(f"✅ Medical records found for **Patient ID: {st.session_state['records_patient']}**")
+        for record_id, visit_date, diagnosis in visits:
+            with st.expander(f"📅 {visit_date} — {diagnosis}"):
+                details = st.session_state["records_details"].get(record_id)
+                if details is None:
+                    st.button("Show full record", key=f"record_{record_id}", on_click=load_details, args=(record_id,))
+                else:
+                    st.write(f"**💊 Treatment:** {details['treatment'] or '—'}")
+                    st.write(f"**📝 Prescriptions:** {details['prescriptions'] or '—'}")
+                    st.write(f"**🧪 Lab Results:** {details['lab_results'] or '—'}")
+                    st.write(f"**🗒️ Notes:** {details['notes'] or '—'}")
+        if st.session_state["records_cursor"]:
+            st.button("⬇️ Load older visits", on_click=load_visits, args=(True,))
     else:
-        st.error("❌ Please enter a valid Patient ID.")
+        st.warning("⚠️ No medical records found for this patient.")
+
+# Search Records (ranked full-text search over all free-text fields)
+st.header("🔎 Search Records")
+
+def reset_search_page():
+    st.session_state["search_page"] = 0
+
+col1, col2 = st.columns([3, 1])
+with col1:
+    search_text = st.text_input(
+        "Search diagnoses, treatments, prescriptions, labs and notes", key="search_text",
+        on_change=reset_search_page, placeholder='e.g. "chest pain" troponin, or cardio*',
+    )
+with col2:
+    only_patient = st.checkbox("This patient only", disabled=not patient_id, on_change=reset_search_page)
+
+if search_text.strip():
+    page = st.session_state.setdefault("search_page", 0)
+    hits, total = search_records(
+        search_text, patient_id if only_patient else None,
+        limit=SEARCH_PAGE_SIZE, offset=page * SEARCH_PAGE_SIZE,
+    )
+    if not total:
+        st.warning("⚠️ No matching records.")
+    else:
+        pages = (total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
+        st.caption(f"{total} matching records · page {page + 1} of {pages}")
+        for hit in hits.itertuples():
+            st.markdown(f"**{hit.visit_date}** · Patient `{hit.patient_id}` · {hit.diagnosis}")
+            # Quote every line: a plain "> " prefix only covers the first line of a multi-line snippet
+            st.markdown("\n".join(f"> {line}" for line in hit.snippet.splitlines()))
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⬅️ Previous", disabled=page == 0):
+                st.session_state["search_page"] -= 1
+                st.rerun()
+        with col2:
+            if st.button("Next ➡️", disabled=page + 1 >= pages):
+                st.session_state["search_page"] += 1
+                st.rerun()
 
 # Add New Record
 st.header("🆕 Add New Medical Record")
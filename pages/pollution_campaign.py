@@ -1,21 +1,19 @@
+from datetime import date, timedelta
 import streamlit as st
-import pickle
-import numpy as np
-import pandas as pd
-
-# Load the trained model
-@st.cache_resource
-def load_model():
-    with open(r"C:\Users\KRISH\.spyder-py3\HMS\models\Pollution.pkl", "rb") as file:
-        models = pickle.load(file)
-    return models
-
-models = load_model()
+from hms.campaigns import (
+    record_campaign, record_campaigns, suggest_diseases, classify_risk, find_campaigns, load_areas, plan_campaign,
+)
+from hms.features import POLLUTION_SPEC
+from hms.prediction_cache import cached_predict
+from hms.warmup import require_models
 
 # Streamlit App UI
 st.title("🏥 Health Campaign & Disease Prediction")
 st.subheader("Enter Area Details & Environmental Data")
 
+# AQI model is loaded in the background at server start
+model_ready = require_models("pollution")
+
 # Input Form in Center
 with st.form("health_campaign_form"):
     area_name = st.text_input("🏙️ Area Name")
@@ -34,63 +32,22 @@ with st.form("health_campaign_form"):
     min_temp = st.number_input("Min Temperature (°C)", min_value=-10.0, max_value=50.0, value=20.0)
     humidity = st.number_input("Humidity (%)", min_value=0.0, max_value=100.0, value=60.0)
     
-    submit_button = st.form_submit_button("📌 Submit & Predict")
+    submit_button = st.form_submit_button("📌 Submit & Predict", disabled=not model_ready)
 
 if submit_button:
     # Prepare input array for prediction
-    input_features = np.array([[pm2_5_avg, pm10_avg, no2_avg, nh3_avg, so2_avg, co_avg, ozone_avg, max_temp, min_temp, humidity]])
-    prediction = models.predict(input_features)[0]
-    
-    # Function to suggest diseases based on pollutants
-    def suggest_diseases(pm10, no2, so2, co, ozone, temp, humidity):
-        diseases = []
-        if pm10 > 100:
-            diseases.append("Respiratory issues (Asthma, COPD, Allergies)")
-        if no2 > 40 or so2 > 20:
-            diseases.append("Bronchitis, Eye Irritation, Lung Damage")
-        if co > 2:
-            diseases.append("Cardiovascular Disease, Headaches, Fatigue")
-        if ozone > 100:
-            diseases.append("Throat Irritation, Breathing Issues")
-        if temp > 40:
-            diseases.append("Heatstroke, Dehydration")
-        if humidity > 80:
-            diseases.append("Flu, Pneumonia, Bacterial Infections")
-        return diseases if diseases else ["No significant health risks detected"]
+    readings = {
+        "pm2_5": pm2_5_avg, "pm10": pm10_avg, "no2": no2_avg, "nh3": nh3_avg, "so2": so2_avg,
+        "co": co_avg, "ozone": ozone_avg, "max_temp": max_temp, "min_temp": min_temp, "humidity": humidity,
+    }
+    prediction = cached_predict("pollution", POLLUTION_SPEC.build(readings))[0]
     
     diseases = suggest_diseases(pm10_avg, no2_avg, so2_avg, co_avg, ozone_avg, max_temp, humidity)
     
-    # Function to classify risk
-    def classify_risk(predicted_value):
-        if predicted_value > 300:
-            return "High Risk"
-        elif predicted_value > 150:
-            return "Moderate Risk"
-        else:
-            return "Low Risk"
-    
     risk_category = classify_risk(prediction)
     
-    # Save campaign data (Optional: Can be stored in a database)
-    campaign_data = {
-        "Area": area_name,
-        "City": city,
-        "State": state,
-        "PM2.5": pm2_5_avg,
-        "PM10": pm10_avg,
-        "NO2": no2_avg,
-        "NH3": nh3_avg,
-        "SO2": so2_avg,
-        "CO": co_avg,
-        "Ozone": ozone_avg,
-        "Max Temp": max_temp,
-        "Min Temp": min_temp,
-        "Humidity": humidity,
-        "Risk Category": risk_category,
-        "Diseases": diseases
-    }
-    df = pd.DataFrame([campaign_data])
-    df.to_csv("health_campaigns.csv", mode='a', index=False, header=False)
+    # Save campaign data
+    record_campaign(area_name, city, state, readings, prediction, risk_category, diseases)
     
     # Display results
     st.subheader(f"🏥 Predicted Risk Category: {risk_category}")
@@ -101,6 +58,51 @@ if submit_button:
     
     st.info("✅ Data has been saved for the health campaign.")
 
+# Bulk Area Scoring (one prediction for a whole file of areas)
+st.divider()
+st.subheader("📂 Bulk Campaign Planning")
+st.caption("Upload a CSV or Parquet with area, city, state and the ten readings (pm2_5, pm10, no2, nh3, so2, co, ozone, max_temp, min_temp, humidity).")
+areas_file = st.file_uploader("Areas / monitoring stations", type=["csv", "parquet"])
+
+if areas_file and st.button("📊 Score All Areas", disabled=not model_ready):
+    try:
+        st.session_state["campaign_plan"] = plan_campaign(load_areas(areas_file, areas_file.name))
+    except (ValueError, ImportError) as exc:
+        st.error(f"❌ Could not read the file: {exc}")
+
+plan = st.session_state.get("campaign_plan")
+if plan is not None:
+    summary = plan["risk_category"].value_counts()
+    st.write(" · ".join(f"**{category}**: {count}" for category, count in summary.items()))
+    display = plan.assign(diseases=plan["diseases"].str.join("; "))
+    st.dataframe(display, use_container_width=True)
+    st.download_button("⬇️ Download Plan (CSV)", display.to_csv(index=False), file_name="campaign_plan.csv", mime="text/csv")
+    if st.button("💾 Save Plan as Campaigns"):
+        record_campaigns(plan.assign(source="bulk"))
+        del st.session_state["campaign_plan"]
+        st.success(f"✅ Saved {len(plan)} campaigns.")
+
+# Campaign History (by city or state and date range)
+st.divider()
+st.subheader("🗂️ Campaign History")
+col1, col2, col3 = st.columns(3)
+with col1:
+    history_city = st.text_input("🌆 Filter by City")
+with col2:
+    history_state = st.text_input("🗺️ Filter by State")
+with col3:
+    history_dates = st.date_input("📅 Date Range", value=(date.today() - timedelta(days=30), date.today()))
+
+start, end = (history_dates + (None, None))[:2] if isinstance(history_dates, tuple) else (history_dates, None)
+history = find_campaigns(
+    city=history_city, state=history_state,
+    start=start, end=end + timedelta(days=1) if end else None,
+)
+if history.empty:
+    st.info("No campaigns found for these filters.")
+else:
+    st.dataframe(history.drop(columns=["campaign_id"]), use_container_width=True)
+
 # Back Button
 st.divider()
 if st.button("🔙 Back to Dashboard"):
@@ -1,61 +1,38 @@
 import streamlit as st
-import sqlite3
-import pickle
-import numpy as np
-
-
-# --- Load Trained Model ---
-model_path = r"C:\Users\KRISH\.spyder-py3\HMS\models\CVRA2.pkl"
-with open(model_path, "rb") as file:
-    model = pickle.load(file)
-
-# --- SQLite Connection Function ---
-def get_db_connection():
-    db_path = r"C:\Users\KRISH\.spyder-py3\HMS\hms_database.sqlite"
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row  # allows fetching rows as dict-like objects
-    return conn
-
-# --- Fetch Patient Data by Patient ID ---
-def fetch_patient_data(patient_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    query = """
-    SELECT age, gender, smoking, diabetes, hypertension, CAD, HB, TLC, glucose, urea, creatinine, BNP, EF
-    FROM patients
-    WHERE patient_id = ?
-    """
-    cursor.execute(query, (patient_id,))
-    result = cursor.fetchone()
-
-    conn.close()
-
-    if result:
-        # Convert result to dict
-        return dict(result)
-    else:
-        return None
+from hms.features import RISK_SPEC, is_yes
+from hms.patient_context import get_patient_context
+from hms.prediction_cache import cached_predict
+from hms.risk_batch import score_cohort, top_n
+from hms.warmup import require_models
+from hms.widgets import patient_picker
 
 # --- Streamlit UI ---
 st.title("❤️ Cardiovascular Risk Analysis")
 
-# --- Input Patient ID ---
-patient_id = st.text_input("🔍 Enter Patient ID to Fetch Data")
+# --- Model Readiness (loaded in the background at server start) ---
+model_ready = require_models("cvra")
+
+# --- Patient Lookup (typeahead by name or ID) ---
+patient_id = patient_picker(key="risk_patient")
 
+# The fetched patient stays loaded, so the form survives the Run Risk Analysis rerun
 if st.button("📥 Fetch Patient Data"):
-    patient_data = fetch_patient_data(patient_id)
+    st.session_state["risk_patient_fetched"] = patient_id
+
+if st.session_state.get("risk_patient_fetched"):
+    patient_id = st.session_state["risk_patient_fetched"]
+    patient_data = get_patient_context(patient_id)
 
     if patient_data:
         st.success(f"✅ Data found for Patient ID: **{patient_id}**")
 
         # Pre-fill form with patient data (editable if needed)
         age = patient_data['age']
-        gender = "Male" if patient_data['gender'] == 1 else "Female"
-        smoking = "Yes" if patient_data['smoking'] == 1 else "No"
-        diabetes = "Yes" if patient_data['diabetes'] == 1 else "No"
-        hypertension = "Yes" if patient_data['hypertension'] == 1 else "No"
-        cad = "Yes" if patient_data['CAD'] == 1 else "No"
+        gender = "Male" if str(patient_data['gender']).lower() in ("male", "1") else "Female"
+        smoking = "Yes" if is_yes(patient_data['smoking']) else "No"
+        diabetes = "Yes" if is_yes(patient_data['diabetes']) else "No"
+        hypertension = "Yes" if is_yes(patient_data['hypertension']) else "No"
+        cad = "Yes" if is_yes(patient_data['CAD']) else "No"
         hb = patient_data['HB']
         tlc = patient_data['TLC']
         glucose = patient_data['glucose']
@@ -80,18 +57,16 @@ if st.button("📥 Fetch Patient Data"):
         bnp = st.number_input("💓 BNP", value=bnp, min_value=10, max_value=5000, step=10)
         ef = st.number_input("💥 Ejection Fraction (EF %)", value=ef, min_value=10, max_value=80, step=1)
 
-        # --- Convert Inputs to Numeric (for model) ---
-        gender = 1 if gender == "Male" else 0
-        smoking = 1 if smoking == "Yes" else 0
-        diabetes = 1 if diabetes == "Yes" else 0
-        hypertension = 1 if hypertension == "Yes" else 0
-        cad = 1 if cad == "Yes" else 0
-
-        input_features = np.array([[age, gender, smoking, diabetes, hypertension, cad, hb, tlc, glucose, urea, creatinine, bnp, ef]])
+        # --- Encode Inputs (for model) ---
+        input_features = RISK_SPEC.build({
+            "age": age, "gender": gender, "smoking": smoking, "diabetes": diabetes,
+            "hypertension": hypertension, "CAD": cad, "HB": hb, "TLC": tlc, "glucose": glucose,
+            "urea": urea, "creatinine": creatinine, "BNP": bnp, "EF": ef,
+        })
 
         # --- Run Prediction ---
-        if st.button("📊 Run Risk Analysis"):
-            prediction = model.predict(input_features)[0]
+        if st.button("📊 Run Risk Analysis", disabled=not model_ready):
+            prediction = cached_predict("cvra", input_features)[0]
             risk_level = "🔴 High Risk" if prediction == 1 else "🟢 Low Risk"
 
             st.subheader("🧬 Prediction Result")
@@ -99,3 +74,20 @@ if st.button("📥 Fetch Patient Data"):
 
     else:
         st.error(f"❌ No data found for Patient ID: **{patient_id}**")
+
+# --- Cohort Risk Worklist ---
+st.divider()
+st.header("📋 Cohort Risk Worklist")
+
+top_count = st.number_input("Show top N highest-risk patients", min_value=5, max_value=500, value=25, step=5)
+
+if st.button("🔄 Re-score All Patients", disabled=not model_ready):
+    with st.spinner("Scoring all patients..."):
+        scores = score_cohort()
+    st.success(f"✅ Scored {len(scores)} patients.")
+
+worklist = top_n(int(top_count))
+if worklist.empty:
+    st.info("No risk scores yet. Run a cohort scoring to build the worklist.")
+else:
+    st.dataframe(worklist, use_container_width=True)
@@ -1,5 +1,5 @@
 import streamlit as st
-import sqlite3
+from hms import db
 
 # Initialize session state variables
 if "logged_in" not in st.session_state:
@@ -9,21 +9,9 @@ if "username" not in st.session_state:
 if "role" not in st.session_state:
     st.session_state["role"] = None
     
-def create_users_table():
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS users 
-                 (id INTEGER PRIMARY KEY, username TEXT UNIQUE, password TEXT, role TEXT)''')
-    conn.commit()
-    conn.close()
-
 def check_username_exists(username):
     """Check if a username already exists in the database."""
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE username=?", (username,))
-    user = c.fetchone()
-    conn.close()
+    user = db.query_one("SELECT * FROM users WHERE username=?", (username,))
     return user is not None  # Returns True if user exists
 
 def add_user(username, password, role):
@@ -32,11 +20,7 @@ def add_user(username, password, role):
         st.error("⚠️ Username already exists. Please choose a different one.")
         return
     
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", (username, password, role))
-    conn.commit()
-    conn.close()
+    db.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", (username, password, role))
     
     st.success("✅ Account created successfully! You can now login.")
     st.switch_page("pages/login.py")  # Redirect to Login Page
@@ -44,8 +28,6 @@ def add_user(username, password, role):
 def show_signup():
     st.title("📝 Sign Up for HMS")
 
-    create_users_table()  # Ensure the table exists
-
     username = st.text_input("Username")
     password = st.text_input("Password", type="password")
     confirm_password = st.text_input("Confirm Password", type="password")
@@ -1,5 +1,5 @@
 import streamlit as st
-import sqlite3
+from hms import db
 
 # Ensure user is logged in
 if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
@@ -14,12 +14,7 @@ st.write(f"Welcome, **{st.session_state['username']}**! Manage hospital operatio
 # Function to fetch staff details
 def get_staff_info(username):
     """Fetch staff details from the database"""
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("SELECT username, role FROM users WHERE username=?", (username,))
-    staff_info = c.fetchone()
-    conn.close()
-    return staff_info
+    return db.query_one("SELECT username, role FROM users WHERE username=?", (username,))
 
 # Display staff info
 staff_info = get_staff_info(st.session_state["username"])
@@ -49,6 +44,9 @@ with col2:
     if st.button("🛏️ Bed Availability"):
         st.switch_page("pages/bed_availability.py")  # Redirect to Bed Availability Page
 
+    if st.button("📈 Campaign Analytics"):
+        st.switch_page("pages/campaign_analytics.py")  # Redirect to Campaign Analytics Page
+
 # Logout Button
 st.divider()
 if st.button("❌ Logout"):
@@ -1,23 +1,11 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-import pickle
-from sklearn.ensemble import RandomForestClassifier
-
-# Load the trained Random Forest model
-rf_model = pickle.load(open(r"C:\Users\KRISH\.spyder-py3\HMS\models\survival2.pkl", 'rb'))  # Replace with correct path
-
-# Function to fetch patient details from the database
-def get_patient_details(patient_id):
-    conn = sqlite3.connect("database/hms_database.db")
-    c = conn.cursor()
-    c.execute("""
-        SELECT age, gender, admission_type, smoking, hypertension, diabetes, CAD
-        FROM patients WHERE patient_id=?
-    """, (patient_id,))
-    result = c.fetchone()
-    conn.close()
-    return result if result else None
+from hms.features import SURVIVAL_SPEC, is_yes
+from hms.patient_context import get_patient_context
+from hms.patients import SURVIVAL_HISTORY, save_survival_history
+from hms.prediction_cache import cached_predict
+from hms.survival_batch import score_changed, low_survival_patients
+from hms.warmup import require_models
+from hms.widgets import patient_picker
 
 # Streamlit UI
 st.markdown("""
@@ -55,15 +43,23 @@ st.markdown("""
 st.title("🏥 Survival Model Analysis")
 st.subheader("🔍 Predict Survival Risk")
 
-# Input Patient ID
+# Random Forest model is loaded in the background at server start
+model_ready = require_models("survival")
+
+# Patient Lookup (typeahead by name or ID)
 tab1, tab2 = st.tabs(["📋 Patient Lookup", "🔢 Manual Entry"])
 
 with tab1:
-    patient_id = st.text_input("Enter Patient ID:")
+    patient_id = patient_picker(key="survival_patient")
     if st.button("🔍 Fetch Data"):
-        patient_data = get_patient_details(patient_id)
+        # Kept across reruns so the history fields below stay prefilled
+        st.session_state["survival_patient_fetched"] = patient_id
+        patient_data = get_patient_context(patient_id)
         if patient_data:
-            age, gender, admission_type, smoking, hypertension, diabetes, CAD = patient_data
+            age, gender, admission_type, smoking, hypertension, diabetes, CAD = (
+                patient_data[column] for column in
+                ("age", "gender", "admission_type", "smoking", "hypertension", "diabetes", "CAD")
+            )
             st.success("✅ Patient data retrieved!")
         else:
             st.error("❌ No patient found with this ID!")
@@ -78,22 +74,34 @@ with tab2:
     dm = st.selectbox("🩸 Diabetes", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
     cad = st.selectbox("🫀 CAD", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
 
-# Additional inputs
-alcohol = st.selectbox("🍺 Alcohol", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
-prior_cmp = st.selectbox("🔄 Prior CMP", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
-ckd = st.selectbox("🩺 CKD", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
-heart_failure = st.selectbox("💔 Heart Failure", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
-hfref = st.selectbox("🔍 HFREF", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
-hfnef = st.selectbox("⚕️ HFNEF", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
+# Additional inputs (prefilled from the fetched patient's stored history)
+fetched_id = st.session_state.get("survival_patient_fetched")
+fetched = get_patient_context(fetched_id)
+history = {column: int(is_yes(fetched[column])) if fetched else 0 for column in SURVIVAL_HISTORY}
+
+alcohol = st.selectbox("🍺 Alcohol", [0, 1], index=history["alcohol"], format_func=lambda x: "Yes" if x == 1 else "No")
+prior_cmp = st.selectbox("🔄 Prior CMP", [0, 1], index=history["prior_cmp"], format_func=lambda x: "Yes" if x == 1 else "No")
+ckd = st.selectbox("🩺 CKD", [0, 1], index=history["ckd"], format_func=lambda x: "Yes" if x == 1 else "No")
+heart_failure = st.selectbox("💔 Heart Failure", [0, 1], index=history["heart_failure"], format_func=lambda x: "Yes" if x == 1 else "No")
+hfref = st.selectbox("🔍 HFREF", [0, 1], index=history["hfref"], format_func=lambda x: "Yes" if x == 1 else "No")
+hfnef = st.selectbox("⚕️ HFNEF", [0, 1], index=history["hfnef"], format_func=lambda x: "Yes" if x == 1 else "No")
+
+# Census scoring reads these from the patient row, so save them there
+if fetched and st.button(f"💾 Save History for {fetched['name'] or fetched_id}"):
+    save_survival_history(fetched_id, {
+        "alcohol": alcohol, "prior_cmp": prior_cmp, "ckd": ckd,
+        "heart_failure": heart_failure, "hfref": hfref, "hfnef": hfnef,
+    })
+    st.success("✅ Survival history saved. Rescore changed patients to update census scores.")
 
 # Button to make prediction
-if st.button("🩺 Predict Survival"):
-    input_data = pd.DataFrame({
-        'age': [age], 'gender': [gender], 'type_of_admission': [type_of_admission], 'smoking': [smoking],
-        'alcohol': [alcohol], 'htn': [htn], 'dm': [dm], 'cad': [cad], 'prior_cmp': [prior_cmp],
-        'ckd': [ckd], 'heart_failure': [heart_failure], 'hfref': [hfref], 'hfnef': [hfnef]
+if st.button("🩺 Predict Survival", disabled=not model_ready):
+    input_data = SURVIVAL_SPEC.build({
+        'age': age, 'gender': gender, 'admission_type': "OPD" if type_of_admission == 1 else "EMERGENCY",
+        'smoking': smoking, 'alcohol': alcohol, 'hypertension': htn, 'diabetes': dm, 'CAD': cad,
+        'prior_cmp': prior_cmp, 'ckd': ckd, 'heart_failure': heart_failure, 'hfref': hfref, 'hfnef': hfnef
     })
-    prediction = rf_model.predict(input_data)
+    prediction = cached_predict("survival", input_data)
     
     # Convert class to readable survival status
     survival_status = "High ✅" if prediction[0] == 1 else "Low ❌"
@@ -106,6 +114,19 @@ if st.button("🩺 Predict Survival"):
         </div>
     """, unsafe_allow_html=True)
 
+# Census-wide scoring (only patients whose inputs changed are re-run)
+st.divider()
+st.subheader("🗂️ Census Survival Scores")
+if st.button("🔄 Rescore Changed Patients", disabled=not model_ready):
+    with st.spinner("Scoring changed patients..."):
+        scored, skipped = score_changed()
+    st.success(f"✅ Rescored {scored} patients ({skipped} unchanged).")
+
+low_survival = low_survival_patients()
+if not low_survival.empty:
+    st.write("Patients predicted with low survival:")
+    st.dataframe(low_survival, use_container_width=True)
+
 # Back Button
 st.divider()
 if st.button("🔙 Back to Dashboard"):
@@ -0,0 +1,32 @@
+import numpy as np
+
+from hms.aq_stream import RollingWindow
+from hms.campaigns import POLLUTANTS
+
+
+def _values(level):
+    return np.full(len(POLLUTANTS), float(level))
+
+
+def test_late_reading_inside_window_is_evicted_in_time_order():
+    window = RollingWindow(seconds=100)
+    window.add(1000, _values(10))
+    window.add(1050, _values(20))
+    assert window.add(960, _values(90))  # late, but still inside the window
+
+    assert [at for at, _, _ in window.readings] == [960, 1000, 1050]
+    np.testing.assert_allclose(window.means(), 40.0)
+
+    # Moving to 1070 expires 960 even though it arrived after 1000
+    window.evict(1070)
+    np.testing.assert_allclose(window.means(), 15.0)
+    assert window.counts.tolist() == [2] * len(POLLUTANTS)
+
+
+def test_reading_older_than_the_window_is_dropped():
+    window = RollingWindow(seconds=100)
+    window.add(1000, _values(10))
+    assert not window.add(850, _values(500))
+
+    assert len(window.readings) == 1
+    np.testing.assert_allclose(window.means(), 10.0)
@@ -0,0 +1,10 @@
+import numpy as np
+import pandas as pd
+
+from hms.prediction_cache import cached_predict
+
+
+def test_cached_predict_with_no_rows_returns_empty_array():
+    # Returns before touching the registry, so no model file is needed
+    assert cached_predict("pollution", np.empty((0, 10))).shape == (0,)
+    assert cached_predict("pollution", pd.DataFrame(columns=["a", "b"])).shape == (0,)
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from sklearn.linear_model import LogisticRegression
+
+from hms.risk_batch import positive_column
+
+X = np.array([[0.0], [0.2], [0.8], [1.0]])
+
+
+@pytest.mark.parametrize("labels", [[0, 0, 1, 1], [False, False, True, True], ["no", "no", "yes", "yes"]])
+def test_positive_column_for_binary_labels(labels):
+    model = LogisticRegression().fit(X, labels)
+    column = positive_column(model)
+    assert model.predict_proba(np.array([[1.0]]))[0, column] > 0.5
+
+
+def test_positive_column_names_the_labels_of_a_multiclass_model():
+    model = LogisticRegression().fit(X, ["low", "mid", "high", "high"])
+    with pytest.raises(ValueError, match="high, low, mid"):
+        positive_column(model)
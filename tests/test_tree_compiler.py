@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from sklearn.ensemble import RandomForestClassifier
+
+from hms.tree_compiler import check_parity, compile_model, parity_inputs
+
+
+def _nan_model():
+    """A forest whose label depends on missingness, so some splits are NaN-only (threshold inf)."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4))
+    X[rng.random(X.shape) < 0.3] = np.nan
+    y = np.isnan(X[:, 0]).astype(int)
+    return RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+
+
+def test_parity_with_model_fit_on_nan_data():
+    model = _nan_model()
+    compiled = compile_model(model)
+    assert np.isinf(compiled.threshold).any()
+
+    rows = parity_inputs(compiled, n_rows=500)
+    assert np.isfinite(rows).all()
+    ok, diff = check_parity(model, compiled, rows)
+    assert ok, diff
+
+
+def test_parity_inputs_fall_back_when_every_cut_is_infinite():
+    compiled = compile_model(_nan_model())
+    split = compiled.left != np.arange(len(compiled.left))
+    compiled.threshold[split] = np.inf
+
+    rows = parity_inputs(compiled, n_rows=100)
+    assert ((rows >= 0.0) & (rows <= 1.0)).all()
@@ -0,0 +1,25 @@
+import pickle
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from sklearn.linear_model import LogisticRegression
+
+from hms.model_registry import ModelRegistry
+from hms.warmup import MISSING, READY, Warmup
+
+
+def test_retry_picks_up_a_model_deployed_after_warmup(tmp_path):
+    warmup = Warmup(ModelRegistry(models_dir=str(tmp_path), model_files={"cvra": "CVRA2.pkl"}, feature_files={}))
+    warmup.start().wait(timeout=10)
+    assert warmup.status() == {"cvra": MISSING}
+    assert warmup.retry("cvra") == MISSING
+
+    X = np.array([[0.0, 1.0], [1.0, 0.0], [0.5, 0.5], [1.0, 1.0]])
+    model = LogisticRegression().fit(X, [0, 1, 0, 1])
+    (tmp_path / "CVRA2.pkl").write_bytes(pickle.dumps(model))
+
+    assert warmup.retry("cvra") == READY
+    assert warmup.is_ready("cvra")
+    assert warmup.error("cvra") is None